@@ -0,0 +1,411 @@
+"""
+Offline benchmark harness for the ingest_video pipeline
+
+Generates synthetic info.json / comments / YouTube-style rolling VTT and json3 fixtures
+and times the hot paths of ingest_video.py without touching the network:
+
+    - convert_vtt_to_clean_format   (VTT parse + rolling caption dedup)
+    - convert_json3_to_clean_format (native json3 caption events, no dedup)
+    - _merge_overlapping_captions   (word-overlap merge on pre-parsed cues)
+    - build_intelligent_context     (tokenization + budget fitting)
+    - process_comments              (comment sort + formatting)
+    - main()                        (end-to-end, yt-dlp and LLM stubbed out)
+
+Results (latency percentiles, throughput and peak traced memory) are written
+to a JSON file so they can be diffed against a stored baseline.
+
+Usage:
+    python benchmark.py                                  # All sizes, write bench_results.json
+    python benchmark.py --sizes short,long --repeat 5    # Subset of fixture sizes
+    python benchmark.py --only merge,comments            # Subset of benchmarks
+    python benchmark.py --compare baseline.json --threshold 0.25   # Exit 1 on regressions
+
+Fixture sizes:
+    short   - 1 minute clip, 10 comments
+    medium  - 20 minute video, 1,000 comments
+    long    - 3 hour stream, 20,000 comments
+    stream  - 10 hour stream, 100,000 comments
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+import ingest_video
+
+# name -> (duration in seconds, number of comments)
+FIXTURE_SIZES = {
+    'short': (60, 10),
+    'medium': (20 * 60, 1_000),
+    'long': (3 * 3600, 20_000),
+    'stream': (10 * 3600, 100_000),
+}
+
+BENCHMARKS = ['vtt', 'json3', 'merge', 'context', 'comments', 'e2e']
+
+WORDS = (
+    "the a to and of in that is it you for on this with we so but just like what "
+    "about can be have not are if your do they one all there was here now going "
+    "model data video performance tool code build test run fast slow memory cache "
+    "really actually basically right okay um uh you know"
+).split()
+
+class _NullConsole:
+    def print(self, *args, **kwargs):
+        pass
+
+    def rule(self, *args, **kwargs):
+        pass
+
+def _sentence(rng: random.Random, n_words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n_words))
+
+def _vtt_timestamp(seconds: float) -> str:
+    hours, rem = divmod(seconds, 3600)
+    minutes, secs = divmod(rem, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{secs:06.3f}"
+
+def make_rolling_vtt(duration: int, rng: random.Random) -> str:
+    """
+    Build a VTT that mimics YouTube auto-captions: each 2-second cue repeats the
+    previous line above the new one, followed by a 10ms "snapshot" cue.
+    """
+    lines = ["WEBVTT", "Kind: captions", "Language: en", ""]
+    previous = ""
+    t = 0.0
+    while t < duration:
+        current = _sentence(rng, rng.randint(5, 10))
+        text = f"{previous}\n{current}" if previous else current
+        lines.append(f"{_vtt_timestamp(t)} --> {_vtt_timestamp(t + 2.0)} align:start position:0%")
+        lines.append(text)
+        lines.append("")
+        lines.append(f"{_vtt_timestamp(t + 2.0)} --> {_vtt_timestamp(t + 2.01)} align:start position:0%")
+        lines.append(current)
+        lines.append("")
+        previous = current
+        t += 2.01
+    return "\n".join(lines)
+
+def make_json3(duration: int, rng: random.Random) -> dict:
+    """Same speech as make_rolling_vtt in YouTube's json3 shape: word segs plus newline append events"""
+    events = []
+    t = 0.0
+    while t < duration:
+        words = _sentence(rng, rng.randint(5, 10)).split()
+        segs = [{'utf8': (" " if i else "") + word, 'tOffsetMs': i * 200} for i, word in enumerate(words)]
+        events.append({'tStartMs': int(t * 1000), 'dDurationMs': 4000, 'wWinId': 1, 'segs': segs})
+        events.append({'tStartMs': int((t + 2.0) * 1000), 'dDurationMs': 10, 'wWinId': 1, 'aAppend': 1, 'segs': [{'utf8': "\n"}]})
+        t += 2.01
+    return {'wireMagic': 'pb3', 'events': events}
+
+def make_caption_segments(duration: int, rng: random.Random) -> list:
+    """Pre-parsed cue dicts in the shape convert_vtt_to_clean_format hands to the merger"""
+    segments = []
+    previous = ""
+    t = 0.0
+    while t < duration:
+        current = _sentence(rng, rng.randint(5, 10))
+        text = f"{previous} {current}" if previous else current
+        segments.append({'start': t, 'end': t + 2.0, 'text': text})
+        previous = current
+        t += 2.01
+    return segments
+
+def make_info_json(video_id: str, duration: int, n_comments: int, rng: random.Random) -> dict:
+    comments = []
+    for i in range(n_comments):
+        comments.append({
+            'id': f"c{i}",
+            'author': f"@user{rng.randint(0, n_comments * 2)}",
+            'text': _sentence(rng, rng.randint(3, 60)),
+            'like_count': int(rng.paretovariate(1.2)) - 1,
+            'timestamp': 1_700_000_000 + rng.randint(0, 30 * 86400),
+            'parent': 'root',
+        })
+    return {
+        'id': video_id,
+        'title': f"Synthetic benchmark video {video_id}",
+        'description': _sentence(rng, 200),
+        'duration': duration,
+        'channel': 'Benchmark Channel',
+        'comment_count': n_comments,
+        'comments': comments,
+    }
+
+def make_transcript(duration: int, rng: random.Random) -> str:
+    lines = []
+    t = 0.0
+    while t < duration:
+        lines.append(f"[{t:.3f}s -> {t + 4.0:.3f}s] {_sentence(rng, rng.randint(8, 16))}")
+        t += 4.0
+    return "\n".join(lines)
+
+def measure(fn: Callable[[], Optional[int]], repeat: int) -> dict:
+    """Time fn `repeat` times, then run once more under tracemalloc for peak memory"""
+    latencies = []
+    items = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = fn() or 0
+        latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    p50 = ingest_video._percentile(latencies, 50)
+    return {
+        'runs': repeat,
+        'items': items,
+        'latency_min_s': min(latencies),
+        'latency_p50_s': p50,
+        'latency_p95_s': ingest_video._percentile(latencies, 95),
+        'throughput_items_per_s': (items / p50) if p50 > 0 and items else None,
+        'peak_memory_bytes': peak,
+    }
+
+def bench_vtt(workdir: str, duration: int, rng: random.Random, repeat: int) -> dict:
+    vtt_path = os.path.join(workdir, f"bench_{duration}.en.vtt")
+    with open(vtt_path, 'w', encoding='utf-8') as f:
+        f.write(make_rolling_vtt(duration, rng))
+    console = _NullConsole()
+
+    def run():
+        return ingest_video.convert_vtt_to_clean_format(vtt_path, console).count("\n") + 1
+    return measure(run, repeat)
+
+def bench_json3(workdir: str, duration: int, rng: random.Random, repeat: int) -> dict:
+    json3_path = os.path.join(workdir, f"bench_{duration}.en.json3")
+    with open(json3_path, 'w', encoding='utf-8') as f:
+        json.dump(make_json3(duration, rng), f)
+    console = _NullConsole()
+
+    def run():
+        return ingest_video.convert_json3_to_clean_format(json3_path, console).count("\n") + 1
+    return measure(run, repeat)
+
+def bench_merge(duration: int, rng: random.Random, repeat: int) -> dict:
+    segments = make_caption_segments(duration, rng)
+    console = _NullConsole()
+
+    def run():
+        ingest_video._merge_overlapping_captions(segments, console)
+        return len(segments)
+    return measure(run, repeat)
+
+def bench_context(duration: int, n_comments: int, rng: random.Random, repeat: int, config: dict) -> dict:
+    data = make_info_json("benchctx001", duration, n_comments, rng)
+    transcript = make_transcript(duration, rng)
+    console = _NullConsole()
+
+    def run():
+        # build_intelligent_context sorts comments in place, so hand it a fresh list
+        ingest_video.build_intelligent_context(dict(data, comments=list(data['comments'])), transcript, config, console)
+        return 1
+    return measure(run, repeat)
+
+def bench_comments(n_comments: int, rng: random.Random, repeat: int) -> dict:
+    data = make_info_json("benchcmt001", 60, n_comments, rng)
+
+    def run():
+        ingest_video.process_comments(dict(data, comments=list(data['comments'])), 100, True)
+        return n_comments
+    return measure(run, repeat)
+
+def bench_end_to_end(workdir: str, duration: int, n_comments: int, n_videos: int, rng: random.Random, repeat: int, config: dict) -> dict:
+    """Drive main() over n_videos direct URLs with yt-dlp, audio download and the LLM stubbed"""
+    fixture_dir = os.path.join(workdir, "fixtures")
+    os.makedirs(fixture_dir, exist_ok=True)
+    info_fixture = os.path.join(fixture_dir, "fixture.info.json")
+    vtt_fixture = os.path.join(fixture_dir, "fixture.en.vtt")
+    with open(info_fixture, 'w', encoding='utf-8') as f:
+        json.dump(make_info_json("benche2e001", duration, n_comments, rng), f)
+    with open(vtt_fixture, 'w', encoding='utf-8') as f:
+        f.write(make_rolling_vtt(duration, rng))
+
+    run_dir = os.path.join(workdir, "e2e")
+    os.makedirs(run_dir, exist_ok=True)
+    with open(os.path.join(run_dir, "config.yaml"), 'w', encoding='utf-8') as f:
+        json.dump(config, f)  # JSON is valid YAML
+    video_ids = [f"bench{i:06d}" for i in range(n_videos)]
+    with open(os.path.join(run_dir, "urls.txt"), 'w', encoding='utf-8') as f:
+        f.write("\n".join(f"https://www.youtube.com/watch?v={vid}" for vid in video_ids))
+
+    def fake_run_yt_dlp(url, output_template, *args, **kwargs):
+        shutil.copy(info_fixture, f"{output_template}.info.json")
+        shutil.copy(vtt_fixture, f"{output_template}.en.vtt")
+
+    def fake_generate_summary(context, config, console, *args, **kwargs):
+        return "### Video Content Summary\nBenchmark summary.\n\n### Community Intelligence\n**Overall**: Mixed"
+
+    stubs = {
+        'run_yt_dlp': fake_run_yt_dlp,
+        'download_audio': lambda *args, **kwargs: None,
+        'generate_summary': fake_generate_summary,
+    }
+    originals = {name: getattr(ingest_video, name) for name in stubs}
+    args = ingest_video.get_parser().parse_args(["urls.txt"])
+
+    def run():
+        cwd = os.getcwd()
+        stdout = sys.stdout
+        os.chdir(run_dir)
+        sys.stdout = open(os.devnull, 'w')
+        try:
+            for name, stub in stubs.items():
+                setattr(ingest_video, name, stub)
+            ingest_video.main(args)
+        finally:
+            for name, original in originals.items():
+                setattr(ingest_video, name, original)
+            sys.stdout.close()
+            sys.stdout = stdout
+            os.chdir(cwd)
+        return n_videos
+    return measure(run, repeat)
+
+def _missing(module: str) -> Optional[str]:
+    try:
+        __import__(module)
+        return None
+    except ImportError:
+        return f"{module} not installed"
+
+def run_benchmarks(args) -> dict:
+    sizes = [s.strip() for s in args.sizes.split(',') if s.strip()]
+    only = [b.strip() for b in args.only.split(',') if b.strip()]
+    config = {
+        'transcription_provider': 'local',
+        'local_whisper_model': 'base',
+        'local_whisper_compute_type': 'int8',
+        'llm_provider': 'ollama',
+        'llm_model': 'llama3.2:3b',
+        'ollama_base_url': 'http://localhost:11434',
+        'max_context_tokens': args.max_context_tokens,
+        'min_comments': 25,
+        'listing_cache_ttl': 0,
+        # Background warm-up threads would compete with the code being timed
+        'warm_imports': False,
+    }
+
+    requirements = {
+        'vtt': _missing('webvtt'),
+        'context': _missing('tiktoken'),
+        'e2e': _missing('webvtt') or _missing('tiktoken'),
+    }
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix="ytdigest_bench_")
+    try:
+        for size in sizes:
+            duration, n_comments = FIXTURE_SIZES[size]
+            for name in only:
+                entry = {'benchmark': name, 'size': size, 'duration_s': duration, 'comments': n_comments}
+                skip_reason = requirements.get(name)
+                if name == 'e2e' and size == 'stream' and not args.include_stream_e2e:
+                    skip_reason = skip_reason or "use --include-stream-e2e to run end-to-end on 10h fixtures"
+                if skip_reason:
+                    entry['skipped'] = skip_reason
+                    results.append(entry)
+                    print(f"{name:<9} {size:<7} skipped ({skip_reason})")
+                    continue
+
+                rng = random.Random(f"{args.seed}:{name}:{size}")
+                if name == 'vtt':
+                    stats = bench_vtt(workdir, duration, rng, args.repeat)
+                elif name == 'json3':
+                    stats = bench_json3(workdir, duration, rng, args.repeat)
+                elif name == 'merge':
+                    stats = bench_merge(duration, rng, args.repeat)
+                elif name == 'context':
+                    stats = bench_context(duration, n_comments, rng, args.repeat, config)
+                elif name == 'comments':
+                    stats = bench_comments(n_comments, rng, args.repeat)
+                else:
+                    stats = bench_end_to_end(workdir, duration, n_comments, args.e2e_videos, rng, args.repeat, config)
+
+                entry.update(stats)
+                results.append(entry)
+                print(f"{name:<9} {size:<7} p50={stats['latency_p50_s'] * 1000:10.2f}ms  "
+                      f"p95={stats['latency_p95_s'] * 1000:10.2f}ms  "
+                      f"peak={stats['peak_memory_bytes'] / 1e6:8.1f}MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'meta': {
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+
+def compare_to_baseline(report: dict, baseline_path: str, threshold: float) -> list:
+    """Return human-readable regressions where p50 latency or peak memory grew past threshold"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(r['benchmark'], r['size']): r for r in baseline.get('results', []) if 'skipped' not in r}
+
+    regressions = []
+    for result in report['results']:
+        old = previous.get((result['benchmark'], result['size']))
+        if 'skipped' in result or old is None:
+            continue
+        for metric in ['latency_p50_s', 'peak_memory_bytes']:
+            if old.get(metric) and result[metric] > old[metric] * (1 + threshold):
+                change = result[metric] / old[metric] - 1
+                regressions.append(f"{result['benchmark']}/{result['size']} {metric}: {old[metric]:.4g} -> {result[metric]:.4g} (+{change:.0%})")
+    return regressions
+
+def get_parser():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for ingest_video.py")
+    parser.add_argument("--sizes", default="short,medium,long,stream", help=f"Comma-separated fixture sizes ({', '.join(FIXTURE_SIZES)})")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help=f"Comma-separated benchmarks ({', '.join(BENCHMARKS)})")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark (default: 3)")
+    parser.add_argument("--seed", default="ytdigest", help="Seed for fixture generation")
+    parser.add_argument("--e2e-videos", type=int, default=5, help="Videos per end-to-end run (default: 5)")
+    parser.add_argument("--include-stream-e2e", action="store_true", help="Also run end-to-end on the 10 hour fixture")
+    parser.add_argument("--max-context-tokens", type=int, default=65536, help="max_context_tokens for context benchmarks")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON report")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown/memory growth before failing (default: 0.2)")
+    return parser
+
+def main(args) -> int:
+    unknown = [s for s in args.sizes.split(',') if s.strip() and s.strip() not in FIXTURE_SIZES]
+    unknown += [b for b in args.only.split(',') if b.strip() and b.strip() not in BENCHMARKS]
+    if unknown:
+        print(f"Error: unknown sizes/benchmarks: {', '.join(unknown)}")
+        return 2
+
+    report = run_benchmarks(args)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark report written to {args.output}")
+
+    if args.compare:
+        regressions = compare_to_baseline(report, args.compare, args.threshold)
+        if regressions:
+            print("Regressions against baseline:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    parser = get_parser()
+    sys.exit(main(parser.parse_args()))
@@ -4,15 +4,23 @@ Video Summarizer - YouTube video analysis tool
 This tool downloads YouTube metadata, subtitles, and generates AI summaries.
 Accepts either a file containing YouTube URLs (one per line) or a single YouTube URL directly.
 Supports individual videos, playlists, and channels with configurable processing limits.
-VTT subtitle files are automatically converted to clean timestamp format
-with millisecond precision ([Xs.XXXs -> Ys.YYYs] Text) for consistency
-with faster-whisper transcription output.
+Subtitles (YouTube's native json3/srv3 formats, with VTT as the fallback) are
+automatically converted to clean timestamp format with millisecond precision
+([Xs.XXXs -> Ys.YYYs] Text) for consistency with faster-whisper transcription output.
 
 Usage:
     python ingest_video.py urls.txt                           # Process URLs from file
     python ingest_video.py https://www.youtube.com/watch?v=ID # Process single video
     python ingest_video.py @LinuxfoundationOrg --channel-limit 25  # Process channel
     python ingest_video.py UCfX55Sx5hEFjoC3cNs6mCUQ            # Process by channel ID
+    python ingest_video.py urls.txt --plan                    # Show work queue and cost estimate only
+    python ingest_video.py @LinuxfoundationOrg --analyze-comments  # Local comment sentiment for a channel
+    python ingest_video.py @LinuxfoundationOrg --refresh-comments  # Update community sections of existing summaries
+    python ingest_video.py urls.txt --queue /shared/queue.sqlite   # Fill a shared work queue
+    python ingest_video.py --queue /shared/queue.sqlite --worker   # Process queued videos (any number of hosts)
+    python ingest_video.py --queue /shared/queue.sqlite --aggregate  # Write playlist/channel INFO files
+    python ingest_video.py search "rust borrow checker"       # Search processed videos (search_index_path)
+    python ingest_video.py search --semantic "memory safety"  # Semantic search (embedding_index_dir)
 
 Supported input formats:
     - Single video URLs
@@ -26,8 +34,495 @@ import argparse
 import sys
 import time
 import random
+import re
+import threading
+from contextlib import contextmanager
 from typing import Optional, Any
 
+def _percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers (0.0 for an empty list)"""
+    if not values:
+        return 0.0
+    import math
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+class PipelineMetrics:
+    """
+    Per-video stage timings and throughput counters.
+
+    One record is kept per video (per thread, so parallel workers don't mix up
+    their numbers) and appended to a JSONL file when the video finishes.
+    Stage/counter calls outside an active video are silently ignored.
+    """
+
+    STAGES = ['metadata_fetch', 'subtitle_parse', 'audio_download', 'audio_transcode', 'transcription', 'tokenization', 'embedding', 'llm_call', 'search_index']
+
+    def __init__(self):
+        self.metrics_path = None
+        self.profiler = None
+        self.records = []
+        self.gauges = {}
+        self.cache_events = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def configure(self, metrics_path: Optional[str]) -> None:
+        self.metrics_path = metrics_path
+        self.records = []
+        self.gauges = {}
+        self.cache_events = {}
+
+    def _current(self) -> Optional[dict]:
+        return getattr(self._local, 'record', None)
+
+    def begin_video(self, video_id: str, source: Optional[str] = None) -> None:
+        self._local.record = {
+            'video_id': video_id,
+            'source': source,
+            'started_at': time.time(),
+            'stages': {},
+            'counters': {},
+            'labels': {},
+        }
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a pipeline stage; repeated stages within one video are summed"""
+        record = self._current()
+        start = time.perf_counter()
+        try:
+            if self.profiler is None:
+                yield
+            else:
+                with self.profiler.profile(name):
+                    yield
+        finally:
+            if record is not None:
+                record['stages'][name] = record['stages'].get(name, 0.0) + (time.perf_counter() - start)
+
+    def suspend_video(self) -> Optional[dict]:
+        """Detach this thread's current record (e.g. while the video waits for a packed LLM call)"""
+        record = self._current()
+        self._local.record = None
+        return record
+
+    def resume_video(self, record: Optional[dict]) -> None:
+        """Make a record returned by suspend_video() current again"""
+        self._local.record = record
+
+    def add_stage_time(self, name: str, seconds: float) -> None:
+        """Charge time measured outside stage(), such as a video's share of a packed request"""
+        record = self._current()
+        if record is not None:
+            record['stages'][name] = record['stages'].get(name, 0.0) + seconds
+
+    def add(self, counter: str, value: float = 1) -> None:
+        record = self._current()
+        if record is not None and value is not None:
+            record['counters'][counter] = record['counters'].get(counter, 0) + value
+
+    def set(self, counter: str, value) -> None:
+        record = self._current()
+        if record is not None and value is not None:
+            record['counters'][counter] = value
+
+    def label(self, name: str, value: str) -> None:
+        record = self._current()
+        if record is not None and value:
+            record['labels'][name] = value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Run-wide gauge such as queue depth (not tied to a video)"""
+        self.gauges[name] = value
+
+    def cache_event(self, cache: str, hit: bool) -> None:
+        """Count a run-wide cache hit or miss"""
+        key = (cache, 'hit' if hit else 'miss')
+        with self._lock:
+            self.cache_events[key] = self.cache_events.get(key, 0) + 1
+
+    def end_video(self, status: str, error: Optional[str] = None) -> Optional[dict]:
+        import json
+
+        record = self._current()
+        if record is None:
+            return None
+        self._local.record = None
+
+        record['status'] = status
+        record['error'] = error
+        record['total_seconds'] = time.time() - record['started_at']
+        counters = record['counters']
+        transcription_time = record['stages'].get('transcription')
+        if transcription_time and counters.get('audio_duration'):
+            counters['real_time_factor'] = transcription_time / counters['audio_duration']
+
+        with self._lock:
+            self.records.append(record)
+            if self.metrics_path:
+                with open(self.metrics_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record) + "\n")
+        return record
+
+    def summary(self) -> dict:
+        """Aggregate p50/p95/total per stage plus run-wide counters"""
+        stages = {}
+        for name in self.STAGES + sorted({n for r in self.records for n in r['stages']} - set(self.STAGES)):
+            values = [r['stages'][name] for r in self.records if name in r['stages']]
+            if values:
+                stages[name] = {'count': len(values), 'p50': _percentile(values, 50), 'p95': _percentile(values, 95), 'total': sum(values)}
+
+        totals = {}
+        for key in ['bytes_downloaded', 'audio_duration', 'tokens_in', 'tokens_out', 'retries']:
+            totals[key] = sum(r['counters'].get(key, 0) for r in self.records)
+        rtfs = [r['counters']['real_time_factor'] for r in self.records if 'real_time_factor' in r['counters']]
+        totals['real_time_factor_p50'] = _percentile(rtfs, 50)
+        totals['real_time_factor_p95'] = _percentile(rtfs, 95)
+        return {'videos': len(self.records), 'stages': stages, 'totals': totals}
+
+    def print_summary(self, console) -> None:
+        if not self.records:
+            return
+        summary = self.summary()
+        totals = summary['totals']
+
+        console.rule("[bold blue]Stage Timings")
+        for name, stats in summary['stages'].items():
+            console.print(f"[dim]{name:<16} n={stats['count']:<4} p50={stats['p50']:7.2f}s  p95={stats['p95']:7.2f}s  total={stats['total']:8.1f}s[/dim]")
+        console.print(f"[dim]Downloaded {totals['bytes_downloaded'] / 1e6:.1f} MB, "
+                      f"tokens in/out {totals['tokens_in']}/{totals['tokens_out']}, "
+                      f"retries {totals['retries']}[/dim]")
+        if totals['real_time_factor_p50']:
+            console.print(f"[dim]Transcription real-time factor p50={totals['real_time_factor_p50']:.3f} p95={totals['real_time_factor_p95']:.3f}[/dim]")
+        if self.metrics_path:
+            console.print(f"[dim]Per-video metrics written to {self.metrics_path}[/dim]")
+
+pipeline_metrics = PipelineMetrics()
+
+class StageProfiler:
+    """
+    Optional per-stage profiler driven by PipelineMetrics.stage().
+
+    Uses pyinstrument (sampling) when it is installed, cProfile otherwise.
+    Writes one profile per stage (merged across videos) and a single
+    collapsed-stack file per run that flamegraph.pl / speedscope can read.
+    """
+
+    def __init__(self, output_dir: str, backend: str = "auto"):
+        import os
+        if backend == "auto":
+            try:
+                import pyinstrument  # noqa: F401
+                backend = "pyinstrument"
+            except ImportError:
+                backend = "cprofile"
+        self.backend = backend
+        self.output_dir = os.path.join(output_dir, time.strftime("run_%Y%m%d_%H%M%S"))
+        self.collapsed = {}
+        self.stage_stats = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    @contextmanager
+    def profile(self, stage: str):
+        # Profilers can't nest; an inner stage is attributed to the outer one
+        if getattr(self._local, 'active', False):
+            yield
+            return
+
+        self._local.active = True
+        try:
+            if self.backend == "pyinstrument":
+                from pyinstrument import Profiler
+                profiler = Profiler(interval=0.001)
+                profiler.start()
+                try:
+                    yield
+                finally:
+                    profiler.stop()
+                    self._collect_pyinstrument(stage, profiler)
+            else:
+                import cProfile
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    yield
+                finally:
+                    profiler.disable()
+                    self._collect_cprofile(stage, profiler)
+        finally:
+            self._local.active = False
+
+    @staticmethod
+    def _frame_label(func: tuple) -> str:
+        import os
+        filename, line, name = func
+        if filename == '~':
+            return name  # built-in
+        return f"{name} ({os.path.basename(filename)}:{line})"
+
+    def _add_stack(self, stack: tuple, microseconds: float) -> None:
+        weight = int(microseconds)
+        if weight > 0:
+            self.collapsed[stack] = self.collapsed.get(stack, 0) + weight
+
+    def _collect_cprofile(self, stage: str, profiler) -> None:
+        import pstats
+
+        stats = pstats.Stats(profiler)
+        raw = stats.stats  # type: ignore[attr-defined]
+
+        # cProfile only keeps caller->callee edges, so rebuild approximate stacks by
+        # splitting each function's time across its callers in proportion to edge time
+        children = {}
+        for func, (_, _, _, _, callers) in raw.items():
+            for caller, edge in callers.items():
+                children.setdefault(caller, []).append((func, edge[3]))
+        roots = [func for func, (_, _, _, _, callers) in raw.items() if not any(c in raw for c in callers)]
+
+        def walk(func, stack, path_time, depth):
+            _, _, tt, ct, _ = raw[func]
+            if ct <= 0 or path_time <= 1e-7 or depth > 200:
+                return
+            scale = path_time / ct
+            self._add_stack(stack, tt * scale * 1e6)
+            for callee, edge_time in children.get(func, []):
+                if callee in raw and self._frame_label(callee) not in stack:
+                    walk(callee, stack + (self._frame_label(callee),), edge_time * scale, depth + 1)
+
+        with self._lock:
+            for root in roots:
+                walk(root, (f"stage:{stage}", self._frame_label(root)), raw[root][3], 0)
+            if stage in self.stage_stats:
+                self.stage_stats[stage].add(stats)
+            else:
+                self.stage_stats[stage] = stats
+
+    def _collect_pyinstrument(self, stage: str, profiler) -> None:
+        session = profiler.last_session
+        root = session.root_frame() if session else None
+        if root is None:
+            return
+
+        def walk(frame, stack):
+            label = f"{frame.function} ({frame.file_path_short}:{frame.line_no})"
+            stack = stack + (label,)
+            self_time = getattr(frame, 'total_self_time', None)
+            if self_time is None:
+                self_time = frame.time - sum(child.time for child in frame.children)
+            self._add_stack(stack, self_time * 1e6)
+            for child in frame.children:
+                walk(child, stack)
+
+        with self._lock:
+            walk(root, (f"stage:{stage}",))
+            self.stage_stats.setdefault(stage, []).append(session)
+
+    def finish(self, console) -> None:
+        """Write per-stage profiles and the merged collapsed-stack file"""
+        import os
+
+        if not self.stage_stats:
+            return
+        for stage, stats in self.stage_stats.items():
+            if self.backend == "pyinstrument":
+                from pyinstrument.session import Session
+                merged = stats[0]
+                for session in stats[1:]:
+                    merged = Session.combine(merged, session)
+                merged.save(os.path.join(self.output_dir, f"{stage}.pyisession"))
+            else:
+                stats.dump_stats(os.path.join(self.output_dir, f"{stage}.prof"))
+
+        collapsed_path = os.path.join(self.output_dir, "run.collapsed")
+        with open(collapsed_path, 'w', encoding='utf-8') as f:
+            for stack, weight in sorted(self.collapsed.items()):
+                f.write(";".join(frame.replace(';', ',') for frame in stack) + f" {weight}\n")
+        console.print(f"[dim]Profiles ({self.backend}) written to {self.output_dir} (flame graph input: {collapsed_path})[/dim]")
+
+class ResultIndex:
+    """
+    Per-source outcome of every processed video, keyed by video_id.
+
+    INFO files look each listed video up in O(1) and read per-source status
+    counts that are kept up to date as results arrive, instead of scanning a
+    flat results list once per video.
+    """
+
+    def __init__(self):
+        self.by_video: dict[str, dict[str, dict]] = {}  # video_id -> source -> result
+        self.source_counts: dict[str, dict[str, int]] = {}  # source -> status -> count
+        self.lock = threading.Lock()
+
+    def add(self, rows: list) -> None:
+        with self.lock:
+            for row in rows:
+                sources = self.by_video.setdefault(row['video_id'], {})
+                counts = self.source_counts.setdefault(row['source'], {})
+                previous = sources.get(row['source'])
+                if previous is not None:
+                    counts[previous['status']] -= 1
+                sources[row['source']] = row
+                counts[row['status']] = counts.get(row['status'], 0) + 1
+
+    def get(self, video_id: str, source: str) -> Optional[dict]:
+        return self.by_video.get(video_id, {}).get(source)
+
+    def counts(self, source: str) -> dict:
+        return dict(self.source_counts.get(source, {}))
+
+    def rows(self) -> list:
+        with self.lock:
+            return [row for sources in self.by_video.values() for row in sources.values()]
+
+    def __len__(self) -> int:
+        return sum(len(sources) for sources in list(self.by_video.values()))
+
+class MetricsExporter:
+    """
+    Prometheus text exposition of run progress for long-running ingestion jobs.
+
+    Reads the same ResultIndex that feeds print_results_summary plus the
+    per-video records in PipelineMetrics, so it adds no bookkeeping of its own.
+    Can be scraped over HTTP (--metrics-port) or written for node_exporter's
+    textfile collector (--metrics-textfile).
+    """
+
+    LATENCY_BUCKETS = [0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600]
+    RTF_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2, 5]
+    PREFIX = "ytdigest"
+
+    def __init__(self, metrics: PipelineMetrics, results: ResultIndex, config: dict):
+        self.metrics = metrics
+        self.results = results
+        self.llm_provider = config.get('llm_provider', 'unknown')
+        self.transcription_provider = config.get('transcription_provider', 'unknown')
+        self.started_at = time.time()
+        self._server = None
+
+    @staticmethod
+    def _labels(**labels) -> str:
+        if not labels:
+            return ""
+        parts = []
+        for key, value in labels.items():
+            escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            parts.append(f'{key}="{escaped}"')
+        return "{" + ",".join(parts) + "}"
+
+    def _histogram(self, lines: list, name: str, help_text: str, buckets: list, series: dict) -> None:
+        """series maps a label dict (as a tuple of items) to its observed values"""
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for label_items, values in series.items():
+            labels = dict(label_items)
+            for bound in buckets:
+                count = sum(1 for v in values if v <= bound)
+                lines.append(f"{name}_bucket{self._labels(**labels, le=bound)} {count}")
+            lines.append(f"{name}_bucket{self._labels(**labels, le='+Inf')} {len(values)}")
+            lines.append(f"{name}_sum{self._labels(**labels)} {sum(values)}")
+            lines.append(f"{name}_count{self._labels(**labels)} {len(values)}")
+
+    def render(self) -> str:
+        p = self.PREFIX
+        records = list(self.metrics.records)
+        results = [r for r in self.results.rows() if not r.get('mirrored')]
+        lines = []
+
+        lines.append(f"# HELP {p}_videos_total Videos finished, by status")
+        lines.append(f"# TYPE {p}_videos_total counter")
+        for status in ['success', 'failed']:
+            count = sum(1 for r in results if r['status'] == status)
+            lines.append(f"{p}_videos_total{self._labels(status=status)} {count}")
+
+        lines.append(f"# HELP {p}_queue_depth Work items waiting, by queue")
+        lines.append(f"# TYPE {p}_queue_depth gauge")
+        for name, value in sorted(self.metrics.gauges.items()):
+            if name.startswith('queue_depth'):
+                queue = name[len('queue_depth'):].lstrip(':') or 'videos'
+                lines.append(f"{p}_queue_depth{self._labels(queue=queue)} {value}")
+
+        stage_series = {}
+        for record in records:
+            for stage, seconds in record['stages'].items():
+                stage_series.setdefault((('stage', stage),), []).append(seconds)
+        self._histogram(lines, f"{p}_stage_duration_seconds", "Per-video pipeline stage latency", self.LATENCY_BUCKETS, stage_series)
+
+        rtf_values = [r['counters']['real_time_factor'] for r in records if 'real_time_factor' in r['counters']]
+        self._histogram(lines, f"{p}_transcription_real_time_factor", "Transcription time divided by audio duration",
+                        self.RTF_BUCKETS, {(('provider', self.transcription_provider),): rtf_values} if rtf_values else {})
+
+        lines.append(f"# HELP {p}_llm_tokens_total LLM tokens, by provider and direction")
+        lines.append(f"# TYPE {p}_llm_tokens_total counter")
+        token_totals = {}
+        error_totals = {}
+        for record in records:
+            provider = record['labels'].get('llm_model', self.llm_provider).split('/')[0]
+            for direction, counter in [('in', 'tokens_in'), ('out', 'tokens_out')]:
+                key = (provider, direction)
+                token_totals[key] = token_totals.get(key, 0) + record['counters'].get(counter, 0)
+            error_totals[provider] = error_totals.get(provider, 0) + record['counters'].get('llm_errors', 0)
+        for (provider, direction), value in sorted(token_totals.items()):
+            lines.append(f"{p}_llm_tokens_total{self._labels(provider=provider, direction=direction)} {value}")
+        lines.append(f"# HELP {p}_llm_errors_total LLM calls that returned an error, by provider")
+        lines.append(f"# TYPE {p}_llm_errors_total counter")
+        for provider, value in sorted(error_totals.items()):
+            lines.append(f"{p}_llm_errors_total{self._labels(provider=provider)} {value}")
+
+        lines.append(f"# HELP {p}_transcription_errors_total Transcriptions that returned an error, by provider")
+        lines.append(f"# TYPE {p}_transcription_errors_total counter")
+        transcription_errors = sum(r['counters'].get('transcription_errors', 0) for r in records)
+        lines.append(f"{p}_transcription_errors_total{self._labels(provider=self.transcription_provider)} {transcription_errors}")
+
+        lines.append(f"# HELP {p}_bytes_downloaded_total Media bytes downloaded for transcription")
+        lines.append(f"# TYPE {p}_bytes_downloaded_total counter")
+        lines.append(f"{p}_bytes_downloaded_total {sum(r['counters'].get('bytes_downloaded', 0) for r in records)}")
+
+        lines.append(f"# HELP {p}_cache_requests_total Cache lookups, by cache and result")
+        lines.append(f"# TYPE {p}_cache_requests_total counter")
+        for (cache, outcome), value in sorted(self.metrics.cache_events.items()):
+            lines.append(f"{p}_cache_requests_total{self._labels(cache=cache, result=outcome)} {value}")
+
+        lines.append(f"# HELP {p}_run_start_time_seconds Unix time the run started")
+        lines.append(f"# TYPE {p}_run_start_time_seconds gauge")
+        lines.append(f"{p}_run_start_time_seconds {self.started_at}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """Atomically replace a node_exporter textfile-collector file"""
+        import os
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int, address: str = "") -> None:
+        """Serve /metrics from a daemon thread for the lifetime of the process"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        exporter = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((address, port), _Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
 def get_encoding_for_model(provider: str, model: str):
     """Get the appropriate tiktoken encoding for the given LLM provider and model"""
     try:
@@ -72,6 +567,117 @@ def count_tokens(text: str, encoding) -> int:
         return 0
     return len(encoding.encode(text))
 
+_TIMESTAMP_LINE = re.compile(r'^\[(\d+(?:\.\d+)?)s -> (\d+(?:\.\d+)?)s\]\s*(.*)$')
+_DISFLUENCIES = re.compile(r'\b(?:u+h+m*|u+m+|e+r+m*|h+m+|mm+-?hmm+)\b[,.]?\s*', re.IGNORECASE)
+_CAPTION_TAGS = re.compile(r'\[(?:music|applause|laughter|laughs|inaudible|silence|__)\]\s*', re.IGNORECASE)
+# Three or more in a row is a caption stutter; a pair can be real speech ("had had", "that that")
+_REPEATED_WORDS = re.compile(r'\b(\w+)(?:\s+\1\b){2,}', re.IGNORECASE)
+
+def format_clock(seconds: float) -> str:
+    """MM:SS, or H:MM:SS for streams of an hour or more"""
+    total = int(seconds)
+    hours, rem = divmod(total, 3600)
+    minutes, secs = divmod(rem, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:02d}:{secs:02d}"
+
+def transcript_windows(transcript: str, window_seconds: float) -> list:
+    """
+    Group '[Xs -> Ys] text' lines into (start_ms, text) windows of about window_seconds.
+    A transcript without timestamps comes back as a single (None, transcript) window.
+    """
+    windows = []
+    start, texts = None, []
+    for line in transcript.splitlines():
+        match = _TIMESTAMP_LINE.match(line.strip())
+        if not match:
+            continue
+        seg_start = float(match.group(1))
+        if start is not None and seg_start - start >= window_seconds:
+            windows.append((int(start * 1000), " ".join(texts)))
+            start, texts = None, []
+        if start is None:
+            start = seg_start
+        texts.append(match.group(3))
+    if texts:
+        windows.append((int(start * 1000), " ".join(texts)))
+    if not windows and transcript.strip():
+        windows.append((None, transcript))
+    return windows
+
+def compress_transcript(transcript: str, encoding, budget_tokens: int, config: dict, console) -> str:
+    """
+    Shrink a '[Xs -> Ys] text' transcript before it goes into the context.
+
+    Strips disfluencies, caption tags and repeated segments, merges segments
+    into '[MM:SS]' paragraphs of transcript_paragraph_seconds, and if the
+    result still exceeds budget_tokens keeps evenly spaced paragraphs across
+    the whole video (marking gaps with '[...]') instead of cutting the end off.
+    Transcripts that aren't in the timestamped format are returned unchanged.
+    """
+    bucket_seconds = config.get('transcript_paragraph_seconds', 30)
+    lines = transcript.splitlines()
+    paragraphs = []  # [start_seconds, [texts]]
+    previous_text = None
+    parsed = 0
+    for line in lines:
+        match = _TIMESTAMP_LINE.match(line.strip())
+        if not match:
+            continue
+        parsed += 1
+        start = float(match.group(1))
+        text = _CAPTION_TAGS.sub('', match.group(3))
+        text = _DISFLUENCIES.sub('', text)
+        text = _REPEATED_WORDS.sub(r'\1', text).strip(' ,')
+        # Auto-captions often repeat the previous cue, or its last few words as a short segment
+        lowered = text.lower()
+        if not text or lowered == previous_text or (
+                previous_text and len(lowered.split()) <= 3
+                and (' ' + previous_text).endswith(' ' + lowered)):
+            continue
+        previous_text = lowered
+        if not paragraphs or start - paragraphs[-1][0] >= bucket_seconds:
+            paragraphs.append([start, [text]])
+        else:
+            paragraphs[-1][1].append(text)
+
+    if not paragraphs or parsed < len([l for l in lines if l.strip()]) / 2:
+        return transcript
+
+    blocks = [f"[{format_clock(start)}] {' '.join(texts)}" for start, texts in paragraphs]
+    block_tokens = [count_tokens(block + "\n", encoding) for block in blocks]
+    total_tokens = sum(block_tokens)
+    original_tokens = count_tokens(transcript, encoding)
+    console.print(f"[dim]Transcript compressed from {original_tokens} to {total_tokens} tokens "
+                  f"({len(lines)} segments -> {len(blocks)} paragraphs)[/dim]")
+    if total_tokens <= budget_tokens:
+        return "\n".join(blocks)
+
+    # Keep an evenly spaced subset of paragraphs (first and last included) so the whole timeline stays represented
+    gap_tokens = count_tokens("[...]\n", encoding)
+    count = max(1, int(len(blocks) * budget_tokens / total_tokens))
+    while True:
+        if count == 1:
+            keep = [0]
+        else:
+            keep = sorted({round(j * (len(blocks) - 1) / (count - 1)) for j in range(count)})
+        gaps = sum(1 for a, b in zip([-1] + keep, keep + [len(blocks)]) if b - a > 1)
+        used = sum(block_tokens[i] for i in keep) + gaps * gap_tokens
+        if used <= budget_tokens or count == 1:
+            break
+        count = max(1, min(count - 1, int(count * budget_tokens / used)))
+
+    output = []
+    last = -1
+    for i in keep:
+        if i - last > 1:
+            output.append("[...]")
+        output.append(blocks[i])
+        last = i
+    if last < len(blocks) - 1:
+        output.append("[...]")
+    console.print(f"[yellow]Transcript sampled evenly: kept {len(keep)} of {len(blocks)} paragraphs across the full duration[/yellow]")
+    return "\n".join(output)
+
 def build_intelligent_context(data: dict, transcript: str, config: dict, console) -> str:
     """Build context string intelligently based on token limits and content priority"""
     
@@ -135,6 +741,9 @@ def build_intelligent_context(data: dict, transcript: str, config: dict, console
     
     # Process transcript within budget
     if transcript_budget > 0:
+        if config.get('compress_transcript', True):
+            transcript = compress_transcript(transcript, encoding, transcript_budget, config, console)
+
         # Encode transcript and cut off when budget exceeded
         transcript_tokens = encoding.encode(transcript)
         if len(transcript_tokens) <= transcript_budget:
@@ -179,19 +788,83 @@ def build_intelligent_context(data: dict, transcript: str, config: dict, console
     # Final token count verification
     final_tokens = count_tokens(context, encoding)
     console.print(f"[green]Final context: {final_tokens} tokens (limit: {max_tokens})[/green]")
+    pipeline_metrics.set('context_tokens', final_tokens)
     
     return context
 
 def get_parser():
     parser = argparse.ArgumentParser()
-    parser.add_argument("input", help="File with YouTube URLs OR a single YouTube URL")
+    parser.add_argument("input", nargs="?", help="File with YouTube URLs OR a single YouTube URL (not needed with --worker/--aggregate)")
     parser.add_argument("--comments", type=int, default=100, help="Max comments to parse")
     parser.add_argument("--all-comments", action="store_true", help="Parse ALL comments")
     parser.add_argument("--no-subtitles", action="store_true", help="Skip subtitle download and directly download audio for transcription")
     parser.add_argument("--save", choices=["meta", "video", "all"], help="Save mode: meta (metadata/transcripts only), video (video file only), all (everything)")
     parser.add_argument("--channel-limit", type=channel_limit_type, default="10", help="Max videos to process from channels (positive integer or 'all', default: 10)")
+    parser.add_argument("--analyze-comments", action="store_true", help="Fetch only metadata and comments, score them locally (no LLM) and add community analytics to INFO files")
+    parser.add_argument("--refresh-comments", action="store_true", help="For videos that already have a summary, fetch only new comments and regenerate just the Community Intelligence section")
+    parser.add_argument("--plan", "--dry-run", dest="plan", action="store_true", help="Expand inputs and print the work queue with estimated costs, without processing anything")
+    parser.add_argument("--queue", metavar="PATH", help="Shared SQLite work queue for distributed runs; with an input, expand it into the queue and exit")
+    parser.add_argument("--worker", action="store_true", help="Claim and process videos from --queue until it is drained (run any number of workers, on any host sharing the file)")
+    parser.add_argument("--aggregate", action="store_true", help="Write playlist/channel INFO files from the results collected in --queue")
+    parser.add_argument("--schedule", choices=list(SCHEDULING_POLICIES), help="Processing order: fifo (input order), shortest, newest, fair (round-robin across sources) or priority (schedule_priorities); default: schedule_policy from config.yaml, else shortest")
+    parser.add_argument("--metrics-file", help="Append per-video stage timings and throughput counters to this JSONL file")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port at /metrics while the run is active")
+    parser.add_argument("--metrics-textfile", help="Rewrite this Prometheus textfile-collector file after every video")
+    parser.add_argument("--profile", action="store_true", help="Profile each pipeline stage and write per-stage profiles plus a collapsed-stack flame graph file to --profile-dir")
+    parser.add_argument("--profile-dir", default="profiles", metavar="DIR", help="Output directory for --profile (default: profiles)")
+    parser.add_argument("--profiler", choices=["auto", "cprofile", "pyinstrument"], default="auto", help="Profiler backend for --profile (default: pyinstrument if installed, else cProfile)")
+    return parser
+
+def get_search_parser():
+    parser = argparse.ArgumentParser(prog="ingest_video.py search", description="Search the index of processed videos")
+    parser.add_argument("query", nargs="+", help="Search terms (FTS5 syntax: \"exact phrase\", OR, NOT, prefix*)")
+    parser.add_argument("--limit", type=int, default=20, help="Max hits to show (default: 20)")
+    parser.add_argument("--kind", action="append", choices=SearchIndex.KINDS, help="Only search this kind of text (repeatable)")
+    parser.add_argument("--channel", help="Only search videos from this channel")
+    parser.add_argument("--index", help="Search index file, or directory with --semantic (default: search_index_path/embedding_index_dir from config.yaml)")
+    parser.add_argument("--semantic", action="store_true", help="Find transcript passages by meaning using the embedding index instead of keywords")
+    parser.add_argument("--json", action="store_true", help="Print hits as JSON lines")
     return parser
 
+def search_main(args) -> None:
+    """Print ranked hits for a query against the local search index"""
+    import os, json
+
+    config = load_config(validate=False) if os.path.exists("config.yaml") else {}
+    if args.semantic:
+        index_path = args.index or config.get('embedding_index_dir') or '.embeddings'
+    else:
+        index_path = args.index or config.get('search_index_path') or 'search.sqlite'
+    if not os.path.exists(index_path):
+        print(f"Error: search index {index_path} not found. Process some videos first.")
+        sys.exit(1)
+
+    if args.semantic:
+        index = EmbeddingIndex(index_path, probe=config.get('embedding_probe', 8))
+        search_args = (args.limit, args.channel)
+    else:
+        index = SearchIndex(index_path)
+        search_args = (args.limit, args.kind, args.channel)
+    try:
+        hits = index.search(" ".join(args.query), *search_args)
+    finally:
+        index.close()
+
+    for hit in hits:
+        url = f"https://www.youtube.com/watch?v={hit['video_id']}"
+        if hit['start_ms'] is not None:
+            url += f"&t={hit['start_ms'] // 1000}s"
+        if args.json:
+            print(json.dumps({**hit, 'url': url}, ensure_ascii=False))
+            continue
+        where = f" @ {hit['start_ms']} ms" if hit['start_ms'] is not None else ""
+        section = f" / {hit['section']}" if hit['section'] else ""
+        print(f"{hit['video_id']}{where}  [{hit['kind']}{section}]  {hit['title']}")
+        print(f"    {hit['snippet']}")
+        print(f"    {url}")
+    if not hits and not args.json:
+        print("No matches.")
+
 def validate_config(config: dict) -> None:
     """Validate configuration and check API key availability for configured providers"""
     import os
@@ -229,7 +902,28 @@ def validate_config(config: dict) -> None:
     else:
         pass
 
-def load_config(config_path="config.yaml"):
+    # Validate LLM tiers
+    for index, tier in enumerate(config.get('llm_tiers') or [], 1):
+        if not isinstance(tier, dict):
+            raise ValueError(f"llm_tiers entry {index} must be a mapping")
+        tier_provider = str(tier.get('llm_provider', llm_provider)).lower()
+        if tier_provider == 'ollama' and 'ollama_base_url' not in tier and 'ollama_base_url' not in config:
+            raise ValueError(f"ollama_base_url must be specified for llm_tiers entry {index}")
+        if tier_provider in ['openai', 'anthropic', 'openrouter', 'groq', 'gemini', 'cerebras']:
+            if not os.environ.get(f"{tier_provider.upper()}_API_KEY"):
+                raise ValueError(f"{tier_provider.upper()}_API_KEY must be provided in config.yaml api_keys section (llm_tiers entry {index})")
+
+    # Validate scheduling
+    schedule_policy = config.get('schedule_policy', 'shortest')
+    if schedule_policy not in SCHEDULING_POLICIES:
+        raise ValueError(f"schedule_policy must be one of: {', '.join(SCHEDULING_POLICIES)}")
+    schedule_priorities(config)
+    for key in ('schedule_window', 'schedule_max_buffered'):
+        value = config.get(key)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < 1):
+            raise ValueError(f"{key} must be a positive integer")
+
+def load_config(config_path="config.yaml", validate: bool = True):
     import os
     try:
         import yaml
@@ -253,10 +947,90 @@ def load_config(config_path="config.yaml"):
             os.environ[key] = value
     
     # Validate configuration
-    validate_config(config)
+    if validate:
+        validate_config(config)
     
     return config
 
+class TranscriptCheckpoint:
+    """
+    Append-only file of transcript lines written while transcription runs.
+
+    The first line identifies the audio and settings it belongs to; a later run
+    with the same key resumes from the end of the last committed segment, and a
+    finished checkpoint (ending in "# complete") is reused without transcribing
+    again. Lines are flushed one by one so a crash loses at most one segment.
+    """
+
+    COMPLETE = "# complete"
+
+    def __init__(self, path: str, key: str):
+        import os
+        self.path = path
+        self.key = key
+        self.lines: list = []
+        self.complete = False
+        self._file = None
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read().splitlines()
+            if content and content[0] == self._header():
+                body = content[1:]
+                self.complete = bool(body) and body[-1] == self.COMPLETE
+                self.lines = body[:-1] if self.complete else body
+
+    def _header(self) -> str:
+        return f"# transcript checkpoint: {self.key}"
+
+    @property
+    def resume_from(self) -> float:
+        """End time (seconds) of the last committed segment"""
+        for line in reversed(self.lines):
+            match = _TIMESTAMP_LINE.match(line)
+            if match:
+                return float(match.group(2))
+        return 0.0
+
+    def _open(self) -> None:
+        if self._file is not None:
+            return
+        if self.lines:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        else:
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self._file.write(self._header() + "\n")
+
+    def append(self, line: str) -> None:
+        self._open()
+        self.lines.append(line)
+        self._file.write(line + "\n")
+        self._file.flush()
+
+    def finish(self, text: Optional[str] = None) -> None:
+        """Mark the transcript complete, first replacing the lines with text if given"""
+        if text is not None:
+            self.close()
+            self.lines = []
+            for line in text.splitlines():
+                self.append(line)
+        self._open()
+        self._file.write(self.COMPLETE + "\n")
+        self.complete = True
+        self.close()
+
+    def start(self) -> None:
+        """Create the file now, even before the first segment is committed"""
+        self._open()
+        self.close()
+
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
 class Transcriber:
     def __init__(self, config):
         if 'transcription_provider' not in config:
@@ -264,9 +1038,10 @@ class Transcriber:
         self.provider = config['transcription_provider'].lower()
         self.config = config
 
-    def transcribe(self, audio_path: str, console) -> str:
+    def transcribe(self, audio_path: str, console, checkpoint: Optional[TranscriptCheckpoint] = None) -> str:
         if self.provider == "local":
-            return self._transcribe_local(audio_path, console)
+            # Local segments stream into the checkpoint; API results arrive in one piece
+            return self._transcribe_local(audio_path, console, checkpoint)
         elif self.provider == "openai":
             return self._transcribe_api(audio_path, console, base_url=None, model="whisper-1")
         elif self.provider == "groq":
@@ -274,7 +1049,17 @@ class Transcriber:
         else:
             raise ValueError(f"Unknown transcription provider: {self.provider}")
 
-    def _transcribe_local(self, audio_path: str, console) -> str:
+    def checkpoint_key(self) -> str:
+        """Settings a checkpoint must match to be resumed (the audio itself is identified by its path)"""
+        model = self.config.get('local_whisper_model') if self.provider == "local" else None
+        transcode = ""
+        if self.config.get('transcode_audio', True):
+            transcode = (f" transcode={self.config.get('transcode_codec', 'opus')}"
+                         f" trim={bool(self.config.get('trim_silence', True))}"
+                         f" tempo={float(self.config.get('transcription_tempo', 1.0) or 1.0)}")
+        return f"{self.provider}/{model or 'api'}{transcode}"
+
+    def _transcribe_local(self, audio_path: str, console, checkpoint: Optional[TranscriptCheckpoint] = None) -> str:
         try:
             from faster_whisper import WhisperModel
         except Exception as e:
@@ -306,18 +1091,26 @@ class Transcriber:
             # Add progress indication
             import time
             start_time = time.time()
-            segments, info = model.transcribe(audio_path, beam_size=5)
+            resume_from = checkpoint.resume_from if checkpoint is not None else 0.0
+            if resume_from:
+                console.print(f"[green]Resuming transcription at {format_clock(resume_from)} "
+                              f"({len(checkpoint.lines)} segments from {checkpoint.path})[/green]")
+                segments, info = model.transcribe(audio_path, beam_size=5, clip_timestamps=[resume_from])
+            else:
+                segments, info = model.transcribe(audio_path, beam_size=5)
             
             console.print(f"[dim]Detected language: {info.language} (probability {info.language_probability:.2f})[/dim]")
             console.print(f"[yellow]Processing transcription segments...[/yellow]")
             
-            output = []
+            output = list(checkpoint.lines) if checkpoint is not None else []
             segment_count = 0
             for segment in segments:
-                start = int(segment.start)
-                end = int(segment.end)
                 text = segment.text.strip()
-                output.append(f"[{start}s -> {end}s] {text}")
+                # Millisecond timestamps so a resumed run starts exactly where this one stopped
+                line = f"[{segment.start:.3f}s -> {segment.end:.3f}s] {text}"
+                output.append(line)
+                if checkpoint is not None:
+                    checkpoint.append(line)
                 segment_count += 1
                 
                 # Show progress every 50 segments
@@ -331,6 +1124,9 @@ class Transcriber:
         except Exception as e:
             console.print(f"[red]Local transcription failed: {e}[/red]")
             return "[Error during local transcription]"
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
 
     def _transcribe_api(self, audio_path: str, console, base_url: Optional[str], model: str) -> str:
         try:
@@ -367,6 +1163,7 @@ class Transcriber:
         for attempt in range(max_retries):
             try:
                 if attempt > 0:
+                    pipeline_metrics.add('retries')
                     console.print(f"[yellow]Retry attempt {attempt + 1}/{max_retries}...[/yellow]")
                 
                 with open(audio_path, "rb") as file:
@@ -457,8 +1254,102 @@ class Transcriber:
         else:
             return str(transcription)
 
-def run_yt_dlp(url: str, output_template: str, save_mode: Optional[str] = None, no_subtitles: bool = False, console=None, max_retries: int = 3):
-    """Run yt-dlp with robust error handling and retry logic"""
+class VideoArtifacts:
+    """
+    Registry of the files one video's pipeline produced, grouped by kind
+    ('info', 'subtitle', 'media', 'transcript', 'checkpoint').
+
+    Paths come from what yt-dlp reports on stdout ("Writing ... to:", "Destination:"
+    and --print after_move:filepath lines) or from the stage that wrote them, so
+    lookups and cleanup never scan the output directory. When yt-dlp reported
+    nothing, the names it derives from the output template (base.info.json,
+    base.en.json3/.srv3/.vtt) are checked directly.
+    """
+
+    MEDIA_EXTENSIONS = ('.mp3', '.m4a', '.aac', '.opus', '.webm', '.mp4', '.mkv')
+    AUDIO_EXTENSIONS = ('.mp3', '.m4a', '.aac', '.opus')
+    SUBTITLE_EXTENSIONS = ('.vtt', '.srt', '.json3', '.srv3', '.ttml')
+    _REPORTED = re.compile(
+        r'(?:Writing video (?:metadata as JSON|subtitles) to|Destination):\s+(.+)$'
+        r'|^\[download\]\s+(.+) has already been downloaded'
+        r'|Merging formats into "(.+)"$'
+    )
+
+    def __init__(self, base_name: str):
+        self.base_name = base_name
+        self.paths: dict[str, list] = {}
+
+    def classify(self, path: str) -> Optional[str]:
+        import os
+        name = os.path.basename(path)
+        ext = os.path.splitext(name)[1].lower()
+        if name.endswith('.info.json'):
+            return 'info'
+        if name.endswith('_transcript.txt'):
+            return 'transcript'
+        if name.endswith(('_transcript.checkpoint', '_transcript.untranscoded.checkpoint')):
+            return 'checkpoint'
+        if ext in self.SUBTITLE_EXTENSIONS:
+            return 'subtitle'
+        if ext in self.MEDIA_EXTENSIONS or path == self.base_name:
+            return 'media'
+        # Fragments, .part files and the like are yt-dlp's own business
+        return None
+
+    def add(self, path: str, kind: Optional[str] = None) -> None:
+        kind = kind or self.classify(path)
+        if kind and path not in self.paths.setdefault(kind, []):
+            self.paths[kind].append(path)
+
+    def discard(self, path: str) -> None:
+        for paths in self.paths.values():
+            if path in paths:
+                paths.remove(path)
+
+    def record_output(self, stdout: Optional[str]) -> None:
+        """Register every file path yt-dlp reported in its output"""
+        for line in (stdout or '').splitlines():
+            line = line.strip()
+            match = self._REPORTED.search(line)
+            if match:
+                self.add(next(group for group in match.groups() if group))
+            elif line.startswith(self.base_name):
+                # A bare path printed by --print after_move:filepath
+                self.add(line)
+
+    def get(self, kind: str) -> Optional[str]:
+        """Most recently reported file of this kind that still exists (a merge's output beats its inputs)"""
+        import os
+        for path in reversed(self.paths.get(kind, [])):
+            if os.path.exists(path):
+                return path
+        fallbacks = {
+            'info': [f"{self.base_name}.info.json"],
+            'subtitle': [f"{self.base_name}.en{ext}" for ext in ('.json3', '.srv3', '.vtt')],
+        }
+        for fallback in fallbacks.get(kind, []):
+            if os.path.exists(fallback):
+                self.add(fallback, kind)
+                return fallback
+        return None
+
+    def files(self, kinds: Optional[tuple] = None) -> list:
+        """Existing registered files, optionally limited to some kinds"""
+        import os
+        for kind in ('info', 'subtitle'):
+            self.get(kind)
+        return [path for kind, paths in self.paths.items() if kinds is None or kind in kinds
+                for path in paths if os.path.isfile(path)]
+
+# Subtitle formats in order of preference: YouTube's native formats carry each caption once,
+# while VTT repeats rolling auto-caption lines
+SUBTITLE_FORMATS = "json3/srv3/vtt"
+
+def run_yt_dlp(url: str, output_template: str, save_mode: Optional[str] = None, no_subtitles: bool = False, console=None, max_retries: int = 3, artifacts: Optional[VideoArtifacts] = None, subtitle_lang: str = "en", newest_comments: Optional[int] = None, video_id: Optional[str] = None):
+    """
+    Run yt-dlp with robust error handling and retry logic (newest_comments: fetch only that many, newest first).
+    With save_mode video/all the video comes from the media cache when an earlier run downloaded it.
+    """
     import subprocess
     
     # Base command with enhanced reliability options
@@ -473,6 +1364,9 @@ def run_yt_dlp(url: str, output_template: str, save_mode: Optional[str] = None,
         "--retry-sleep", "linear=1:5",
         "--no-check-certificates",  # Avoid SSL issues
         "--user-agent", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        # Report final file paths, keeping the usual "Writing ... to:" lines (--print implies --quiet)
+        "--print", "after_move:filepath",
+        "--no-quiet",
     ]
     
     # Subtitle handling logic
@@ -480,11 +1374,17 @@ def run_yt_dlp(url: str, output_template: str, save_mode: Optional[str] = None,
         cmd.extend([
             "--write-subs",
             "--write-auto-subs",
-            "--sub-lang", "en",
+            "--sub-lang", re.escape(subtitle_lang),
+            "--sub-format", SUBTITLE_FORMATS,
         ])
     
+    if newest_comments:
+        cmd.extend(["--extractor-args", f"youtube:comment_sort=new;max_comments={int(newest_comments)}"])
+
     # Video download logic based on save_mode (default: no video download for optimization)
-    if save_mode in ["video", "all"]:
+    save_video = save_mode in ["video", "all"]
+    cached_media = media_cache.lookup(video_id, output_template, console, kinds=('video',)) if save_video else None
+    if save_video and not cached_media:
         # Download video file (default yt-dlp behavior)
         pass
     else:
@@ -499,8 +1399,10 @@ def run_yt_dlp(url: str, output_template: str, save_mode: Optional[str] = None,
     last_error = None
     for attempt in range(max_retries):
         try:
-            if console and attempt > 0:
-                console.print(f"[yellow]Retry attempt {attempt + 1}/{max_retries}...[/yellow]")
+            if attempt > 0:
+                pipeline_metrics.add('retries')
+                if console:
+                    console.print(f"[yellow]Retry attempt {attempt + 1}/{max_retries}...[/yellow]")
             
             # Run with timeout to prevent hanging
             result = subprocess.run(
@@ -510,6 +1412,12 @@ def run_yt_dlp(url: str, output_template: str, save_mode: Optional[str] = None,
                 timeout=300,  # 5 minute timeout
                 text=True
             )
+            if artifacts is not None:
+                artifacts.record_output(result.stdout)
+                if cached_media:
+                    artifacts.add(cached_media, 'media')
+                elif save_video and artifacts.get('media'):
+                    media_cache.store(video_id, 'video', artifacts.get('media'), console)
             return result  # Success
             
         except subprocess.TimeoutExpired as e:
@@ -554,18 +1462,243 @@ def run_yt_dlp(url: str, output_template: str, save_mode: Optional[str] = None,
         stderr=f"All {max_retries} attempts failed. Last error: {last_error}"
     )
 
-def download_audio(url: str, output_template: str, console=None) -> Optional[str]:
-    import os, subprocess, glob
-    
-    # Look for existing audio/video files first (including webm which can contain audio)
-    audio_extensions = ['*.mp3', '*.m4a', '*.aac', '*.opus', '*.webm', '*.mp4', '*.mkv']
-    for ext in audio_extensions:
-        candidates = glob.glob(f"{output_template}{ext}")
-        if candidates:
+def default_subtitle_lang(config: dict) -> str:
+    """First plain language code in subtitle_languages, requested up front with the metadata"""
+    for lang in config.get('subtitle_languages') or ['en']:
+        if lang != 'original' and not any(char in lang for char in '*?['):
+            return lang
+    return 'en'
+
+def resolve_subtitle_track(data: dict, config: dict) -> Optional[tuple]:
+    """
+    Pick the best subtitle track listed in info.json, as (language, automatic).
+
+    subtitle_languages is an ordered list of language codes or fnmatch patterns
+    ("en", "en-*"), where "original" stands for the video's spoken language.
+    With subtitle_prefer_manual (the default) a manual track in any listed
+    language beats every auto caption.
+    """
+    import fnmatch
+
+    preferences = config.get('subtitle_languages') or ['en', 'en-*', 'original']
+    original = data.get('language')
+    manual = [lang for lang in (data.get('subtitles') or {}) if lang != 'live_chat']
+    automatic = list(data.get('automatic_captions') or {})
+
+    def _match(langs: list, pattern: str) -> Optional[str]:
+        if pattern == 'original':
+            if not original:
+                return None
+            # Auto captions list the speech-recognition track as "<lang>-orig" next to translations
+            patterns = [original, f"{original}-orig", f"{original}-*"]
+        else:
+            patterns = [pattern]
+        for candidate in patterns:
+            for lang in langs:
+                if fnmatch.fnmatchcase(lang.lower(), candidate.lower()):
+                    return lang
+        return None
+
+    kinds = [(manual, False), (automatic, True)]
+    if config.get('subtitle_prefer_manual', True):
+        order = [(kind, pattern) for kind in kinds for pattern in preferences]
+    else:
+        order = [(kind, pattern) for pattern in preferences for kind in kinds]
+    for (langs, is_automatic), pattern in order:
+        lang = _match(langs, pattern)
+        if lang:
+            return lang, is_automatic
+    return None
+
+def download_subtitle_track(json_path: str, output_template: str, lang: str, automatic: bool, console=None, artifacts: Optional[VideoArtifacts] = None) -> Optional[str]:
+    """Download one subtitle track from an existing info.json, without extracting the video page again"""
+    import os, subprocess
+
+    cmd = [
+        "yt-dlp",
+        "--load-info-json", json_path,
+        "--skip-download",
+        "--write-auto-subs" if automatic else "--write-subs",
+        "--sub-lang", re.escape(lang),
+        "--sub-format", SUBTITLE_FORMATS,
+        "--output", output_template,
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, check=True, timeout=120, text=True)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        if console:
+            console.print(f"[yellow]Could not download {lang} subtitles: {e}[/yellow]")
+        return None
+
+    if artifacts is None:
+        artifacts = VideoArtifacts(output_template)
+    artifacts.record_output(result.stdout)
+    for ext in ('.json3', '.srv3', '.vtt'):
+        path = f"{output_template}.{lang}{ext}"
+        if os.path.exists(path):
+            # Registered last, so it wins over the up-front download
+            artifacts.discard(path)
+            artifacts.add(path, 'subtitle')
+            return path
+    return None
+
+def fetch_preferred_subtitles(json_path: str, base_name: str, data: dict, config: dict, console, artifacts: VideoArtifacts) -> None:
+    """Swap in the policy's best subtitle track when run_yt_dlp's up-front request didn't already get it"""
+    track = resolve_subtitle_track(data, config)
+    if track is None:
+        return
+    lang, automatic = track
+    # --write-subs --write-auto-subs takes the manual track when there is one
+    initial_lang = default_subtitle_lang(config)
+    fetched = (initial_lang, initial_lang not in (data.get('subtitles') or {}))
+    if track == fetched and artifacts.get('subtitle'):
+        return
+    console.print(f"[blue]Fetching {'auto-generated' if automatic else 'manual'} '{lang}' subtitles[/blue]")
+    download_subtitle_track(json_path, base_name, lang, automatic, console, artifacts)
+
+def _link_or_copy(src: str, dst: str) -> None:
+    """Hardlink src to dst, copying instead when they are on different filesystems"""
+    import os, shutil
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+class MediaCache:
+    """
+    Shared, size-bounded store of downloaded media, keyed by video ID and format.
+
+    Files are named {video_id}.{kind}.{ext} (kind is 'audio' or 'video') and are
+    hardlinked into per-run output directories, so deleting a run's copy never
+    costs a re-download. Hits refresh the file's mtime and the least recently
+    used files are evicted once the directory grows past max_bytes.
+    Disabled (every call a no-op) until configured with a directory.
+    """
+
+    KINDS = ('audio', 'video')
+
+    def __init__(self):
+        self.cache_dir = None
+        self.max_bytes = None
+        self._lock = threading.Lock()
+
+    def configure(self, cache_dir: Optional[str], max_bytes: Optional[int] = None) -> None:
+        import os
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _entries(self) -> list:
+        import os
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                # Skip half-written temp files from concurrent stores
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def lookup(self, video_id: Optional[str], output_template: str, console=None, kinds: tuple = KINDS) -> Optional[str]:
+        """Link a cached file for video_id (of the first of `kinds` available) to output_template.<ext> and return that path"""
+        import os
+        if not self.cache_dir or not video_id:
+            return None
+        for kind in kinds:
+            # Probe the known names directly rather than listing the whole cache directory
+            for ext in VideoArtifacts.MEDIA_EXTENSIONS:
+                path = os.path.join(self.cache_dir, f"{video_id}.{kind}{ext}")
+                dst = f"{output_template}{ext}"
+                try:
+                    os.utime(path)
+                    if not os.path.exists(dst):
+                        _link_or_copy(path, dst)
+                except OSError:
+                    continue
+                pipeline_metrics.cache_event('media', True)
+                if console:
+                    console.print(f"[green]Using cached {kind} for {video_id}: {dst}[/green]")
+                return dst
+        pipeline_metrics.cache_event('media', False)
+        return None
+
+    def store(self, video_id: Optional[str], kind: str, path: str, console=None) -> None:
+        """Add a downloaded file to the cache (as a hardlink) and evict down to max_bytes"""
+        import os
+        if not self.cache_dir or not video_id:
+            return
+        ext = os.path.splitext(path)[1]
+        dst = os.path.join(self.cache_dir, f"{video_id}.{kind}{ext}")
+        tmp = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if os.path.exists(dst) and os.path.samefile(path, dst):
+                return
+            _link_or_copy(path, tmp)
+            os.replace(tmp, dst)
+        except OSError as e:
             if console:
-                console.print(f"[green]Found existing media file for transcription: {candidates[0]}[/green]")
-            return candidates[0]
-    
+                console.print(f"[yellow]Could not add {path} to media cache: {e}[/yellow]")
+            return
+        self.evict(keep=dst)
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        import os
+        if not self.cache_dir or not self.max_bytes:
+            return
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+media_cache = MediaCache()
+
+def download_audio(url: str, output_template: str, console=None, video_id: Optional[str] = None, artifacts: Optional[VideoArtifacts] = None) -> Optional[str]:
+    import os, subprocess
+
+    if artifacts is None:
+        artifacts = VideoArtifacts(output_template)
+
+    def _media_kind(path: str) -> str:
+        return 'audio' if os.path.splitext(path)[1].lower() in VideoArtifacts.AUDIO_EXTENSIONS else 'video'
+
+    def _find_media() -> Optional[str]:
+        media_path = artifacts.get('media')
+        if media_path is None:
+            # Nothing reported (e.g. left over from an earlier run): check the template's names directly
+            for ext in VideoArtifacts.MEDIA_EXTENSIONS:
+                if os.path.exists(f"{output_template}{ext}"):
+                    media_path = f"{output_template}{ext}"
+                    artifacts.add(media_path, 'media')
+                    break
+        return media_path
+
+    def _downloaded(result) -> Optional[str]:
+        artifacts.record_output(result.stdout)
+        return _find_media()
+
+    # Look for media already downloaded for this video (including webm which can contain audio)
+    existing = _find_media()
+    if existing:
+        if console:
+            console.print(f"[green]Found existing media file for transcription: {existing}[/green]")
+        media_cache.store(video_id, _media_kind(existing), existing, console)
+        return existing
+
+    cached = media_cache.lookup(video_id, output_template, console)
+    if cached:
+        artifacts.add(cached, 'media')
+        return cached
+
     # Strategy 1: Try to download audio-only format without conversion
     if console:
         console.print("[yellow]Attempting audio-only download (no conversion)...[/yellow]")
@@ -579,6 +1712,8 @@ def download_audio(url: str, output_template: str, console=None) -> Optional[str
         "--no-check-certificates",
         "--user-agent", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
         "--output", f"{output_template}.%(ext)s",
+        "--print", "after_move:filepath",
+        "--no-quiet",
         url
     ]
     
@@ -592,12 +1727,12 @@ def download_audio(url: str, output_template: str, console=None) -> Optional[str
         )
         
         # Find the downloaded audio file
-        for ext in audio_extensions:
-            candidates = glob.glob(f"{output_template}{ext}")
-            if candidates:
-                if console:
-                    console.print(f"[green]Audio downloaded: {candidates[0]}[/green]")
-                return candidates[0]
+        audio_path = _downloaded(result)
+        if audio_path:
+            if console:
+                console.print(f"[green]Audio downloaded: {audio_path}[/green]")
+            media_cache.store(video_id, 'audio', audio_path, console)
+            return audio_path
                 
     except subprocess.CalledProcessError as e:
         if console:
@@ -623,6 +1758,8 @@ def download_audio(url: str, output_template: str, console=None) -> Optional[str
         "--no-check-certificates",
         "--user-agent", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
         "--output", f"{output_template}.%(ext)s",
+        "--print", "after_move:filepath",
+        "--no-quiet",
         url
     ]
     
@@ -636,12 +1773,12 @@ def download_audio(url: str, output_template: str, console=None) -> Optional[str
         )
         
         # Find the downloaded video file
-        for ext in audio_extensions:
-            candidates = glob.glob(f"{output_template}{ext}")
-            if candidates:
-                if console:
-                    console.print(f"[green]Video file downloaded for transcription: {candidates[0]}[/green]")
-                return candidates[0]
+        video_path = _downloaded(result)
+        if video_path:
+            if console:
+                console.print(f"[green]Video file downloaded for transcription: {video_path}[/green]")
+            media_cache.store(video_id, 'video', video_path, console)
+            return video_path
         
         if console:
             console.print("[yellow]No media file found after download[/yellow]")
@@ -789,91 +1926,1202 @@ def _merge_overlapping_captions(segments: list, console) -> list:
     console.print(f"[blue]Processed {len(segments)} captions into {len(final_merged)} clean segments[/blue]")
     return final_merged
 
-def get_transcript(base_name: str, url: str, config: dict, console, no_subtitles: bool = False, save_mode: Optional[str] = None) -> str:
-    import glob, os
+def _format_timed_events(events: list, console) -> str:
+    """
+    Format (start_seconds, end_seconds, text) events from YouTube's native caption formats.
+    Unlike rolling VTT cues each event carries only new text, so there is nothing to
+    deduplicate; overlapping display windows are just clipped to the next event's start.
+    """
+    events.sort(key=lambda e: e[0])
+    lines = []
+    for index, (start, end, text) in enumerate(events):
+        if index + 1 < len(events) and start < events[index + 1][0] < end:
+            end = events[index + 1][0]
+        lines.append(f"[{start:.3f}s -> {end:.3f}s] {text}")
+    if not lines:
+        raise Exception("No captions found")
+    console.print(f"[blue]Parsed {len(lines)} caption events[/blue]")
+    return '\n'.join(lines)
+
+def convert_json3_to_clean_format(json3_file_path: str, console) -> str:
+    """
+    Convert a YouTube json3 subtitle file to '[Xs.XXXs -> Ys.YYYs] Text content' lines.
+    Each event holds word segments (segs) with offsets from tStartMs; newline-only
+    append events that auto-captions use to roll the display are skipped.
+    """
+    import json
+    with open(json3_file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    events = []
+    for event in data.get('events', []):
+        segs = event.get('segs')
+        if not segs:
+            continue
+        text = ' '.join(''.join(seg.get('utf8', '') for seg in segs).split())
+        if not text:
+            continue
+        start = event.get('tStartMs', 0) / 1000
+        events.append((start, start + event.get('dDurationMs', 0) / 1000, text))
+    return _format_timed_events(events, console)
+
+def convert_srv3_to_clean_format(srv3_file_path: str, console) -> str:
+    """
+    Convert a YouTube srv3 (timedtext XML) subtitle file to '[Xs.XXXs -> Ys.YYYs] Text content' lines.
+    Each <p t= d=> paragraph (times in ms) becomes one line, joining its <s> word spans.
+    """
+    import xml.etree.ElementTree as ET
+    root = ET.parse(srv3_file_path).getroot()
+
+    events = []
+    for p in root.iter('p'):
+        text = ' '.join(''.join(p.itertext()).split())
+        if not text:
+            continue
+        start = int(p.get('t', 0)) / 1000
+        events.append((start, start + int(p.get('d', 0)) / 1000, text))
+    return _format_timed_events(events, console)
+
+# Subtitle converters by file extension; VTT is the fallback for anything else
+SUBTITLE_CONVERTERS = {
+    '.json3': convert_json3_to_clean_format,
+    '.srv3': convert_srv3_to_clean_format,
+}
+
+_FFMPEG_DURATION = re.compile(r'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)')
+_SILENCE_EVENT = re.compile(r'silence_(start|end): (-?\d+(?:\.\d+)?)')
+_LINE_TIMESTAMPS = re.compile(r'^\[(\d+(?:\.\d+)?)s -> (\d+(?:\.\d+)?)s\]', re.MULTILINE)
+_VTT_TIMESTAMP = re.compile(r'\b(\d{2}):(\d{2}):(\d{2})\.(\d{3})\b')
+
+def _detect_edge_silence(audio_path: str) -> tuple:
+    """(speech_start, speech_end) in seconds from an ffmpeg silencedetect pass; speech_end is None if unknown"""
+    import subprocess
+    cmd = ["ffmpeg", "-nostdin", "-hide_banner", "-vn", "-i", audio_path,
+           "-af", "silencedetect=noise=-50dB:d=1", "-f", "null", "-"]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=1800)
+    match = _FFMPEG_DURATION.search(result.stderr)
+    total = int(match.group(1)) * 3600 + int(match.group(2)) * 60 + float(match.group(3)) if match else None
+
+    silences = []
+    for kind, value in _SILENCE_EVENT.findall(result.stderr):
+        if kind == 'start':
+            silences.append([max(0.0, float(value)), None])
+        elif silences:
+            silences[-1][1] = float(value)
+
+    pad = 0.25  # keep a little silence so the first/last word isn't clipped
+    start, end = 0.0, None
+    if silences and silences[0][0] <= 0.05 and silences[0][1] is not None:
+        start = max(0.0, silences[0][1] - pad)
+    if silences and total and (silences[-1][1] is None or silences[-1][1] >= total - 0.05):
+        end = min(total, silences[-1][0] + pad)
+        if end <= start:
+            end = None
+    return start, end
+
+def prepare_audio_for_transcription(audio_path: str, config: dict, console) -> Optional[tuple]:
+    """
+    Transcode media to 16 kHz mono Opus (in an Ogg container, which the OpenAI
+    and Groq endpoints accept) or FLAC with ffmpeg before transcription.
+
+    Optionally trims leading/trailing silence and speeds speech up. Returns
+    (path, offset_seconds, tempo) so transcript timestamps can be mapped back
+    with rescale_transcript_timestamps, or None to transcribe the original file.
+    """
+    import os, shutil, subprocess
+
+    if not config.get('transcode_audio', True):
+        return None
+    if shutil.which("ffmpeg") is None:
+        console.print("[dim]ffmpeg not found; transcribing the downloaded file as-is[/dim]")
+        return None
+
+    codec = str(config.get('transcode_codec', 'opus')).lower()
+    tempo = float(config.get('transcription_tempo', 1.0) or 1.0)
+    out_path = f"{os.path.splitext(audio_path)[0]}.16k.{'flac' if codec == 'flac' else 'ogg'}"
+
+    try:
+        start, end = 0.0, None
+        if config.get('trim_silence', True):
+            start, end = _detect_edge_silence(audio_path)
+
+        cmd = ["ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y"]
+        if start:
+            cmd += ["-ss", f"{start:.3f}"]
+        cmd += ["-i", audio_path, "-vn", "-ac", "1", "-ar", "16000"]
+        if end is not None:
+            cmd += ["-t", f"{end - start:.3f}"]
+        if tempo != 1.0:
+            # atempo accepts 0.5-2.0 per instance, so chain it for factors outside that range
+            factors, remaining = [], tempo
+            while remaining > 2.0:
+                factors.append(2.0)
+                remaining /= 2.0
+            while remaining < 0.5:
+                factors.append(0.5)
+                remaining /= 0.5
+            factors.append(remaining)
+            cmd += ["-af", ",".join(f"atempo={factor:.4f}" for factor in factors)]
+        if codec == 'flac':
+            cmd += ["-c:a", "flac"]
+        else:
+            cmd += ["-c:a", "libopus", "-b:a", str(config.get('transcode_bitrate', '24k')), "-application", "voip"]
+        cmd.append(out_path)
+        subprocess.run(cmd, capture_output=True, check=True, text=True, timeout=1800)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
+        error = getattr(e, 'stderr', None) or e
+        console.print(f"[yellow]Audio transcoding failed, transcribing the downloaded file: {error}[/yellow]")
+        if os.path.exists(out_path):
+            os.remove(out_path)
+        return None
+
+    before, after = os.path.getsize(audio_path), os.path.getsize(out_path)
+    trimmed = f", trimmed to {start:.1f}s-{end:.1f}s" if end is not None else (f", skipped {start:.1f}s of silence" if start else "")
+    console.print(f"[green]Transcoded audio {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB{trimmed}"
+                  f"{f', {tempo}x tempo' if tempo != 1.0 else ''}[/green]")
+    return out_path, start, tempo
+
+def rescale_transcript_timestamps(transcript: str, offset: float, tempo: float) -> str:
+    """Map timestamps of audio prepared by prepare_audio_for_transcription back to the original timeline"""
+    if not offset and tempo == 1.0:
+        return transcript
+
+    def _line(match):
+        start = float(match.group(1)) * tempo + offset
+        end = float(match.group(2)) * tempo + offset
+        return f"[{start:.3f}s -> {end:.3f}s]"
+
+    def _vtt(match):
+        seconds = int(match.group(1)) * 3600 + int(match.group(2)) * 60 + int(match.group(3)) + int(match.group(4)) / 1000
+        seconds = seconds * tempo + offset
+        hours, rem = divmod(seconds, 3600)
+        minutes, secs = divmod(rem, 60)
+        return f"{int(hours):02d}:{int(minutes):02d}:{secs:06.3f}"
+
+    transcript = _LINE_TIMESTAMPS.sub(_line, transcript)
+    # OpenAI returns raw VTT
+    return _VTT_TIMESTAMP.sub(_vtt, transcript)
+
+def get_transcript(base_name: str, url: str, config: dict, console, no_subtitles: bool = False, save_mode: Optional[str] = None, video_id: Optional[str] = None, artifacts: Optional[VideoArtifacts] = None) -> str:
+    import os
+    if artifacts is None:
+        artifacts = VideoArtifacts(base_name)
     if not no_subtitles:
-        vtt_files = glob.glob(f"{base_name}*.vtt")
-        if vtt_files:
-            console.print(f"[green]Subtitle file found: {os.path.basename(vtt_files[0])}[/green]")
+        subtitle_file = artifacts.get('subtitle')
+        if subtitle_file:
+            console.print(f"[green]Subtitle file found: {os.path.basename(subtitle_file)}[/green]")
+            ext = os.path.splitext(subtitle_file)[1].lower()
             try:
-                # Use VTT converter for clean formatting with millisecond precision
-                transcript = convert_vtt_to_clean_format(vtt_files[0], console)
-                console.print("[green]VTT file successfully converted to clean format[/green]")
+                # Native json3/srv3 events need no rolling-caption cleanup; VTT goes through the merger
+                convert = SUBTITLE_CONVERTERS.get(ext, convert_vtt_to_clean_format)
+                with pipeline_metrics.stage('subtitle_parse'):
+                    transcript = convert(subtitle_file, console)
+                console.print(f"[green]{ext[1:].upper()} subtitles successfully converted to clean format[/green]")
                 return transcript
             except Exception as e:
-                # Fallback to audio transcription if VTT conversion fails
-                console.print(f"[yellow]VTT processing failed, falling back to audio transcription: {e}[/yellow]")
+                # Fallback to audio transcription if subtitle conversion fails
+                console.print(f"[yellow]Subtitle processing failed, falling back to audio transcription: {e}[/yellow]")
                 # Continue to audio transcription workflow below
 
     console.print("[yellow]Initiating transcription workflow...")
-    audio_path = download_audio(url, base_name, console)
-    if audio_path:
-        transcriber = Transcriber(config)
-        transcript = transcriber.transcribe(audio_path, console)
-        
+    transcriber = Transcriber(config)
+    # Survives crashes and failed runs; removed with the other artifacts once the video succeeds
+    checkpoint = TranscriptCheckpoint(f"{base_name}_transcript.checkpoint", transcriber.checkpoint_key())
+    artifacts.add(checkpoint.path, 'checkpoint')
+    # Its own file, so the prepared-audio checkpoint survives; its existence records that the provider rejected the prepared file
+    untranscoded_path = f"{base_name}_transcript.untranscoded.checkpoint"
+    untranscoded = os.path.exists(untranscoded_path)
+    if untranscoded:
+        checkpoint = TranscriptCheckpoint(untranscoded_path, f"{transcriber.checkpoint_key()} untranscoded")
+        artifacts.add(checkpoint.path, 'checkpoint')
+
+    def _save_transcript(transcript: str) -> None:
         # Save transcript to file based on save_mode
         if save_mode in ["meta", "all"]:
             transcript_path = f"{base_name}_transcript.txt"
             with open(transcript_path, "w", encoding="utf-8") as f:
                 f.write(transcript)
+            artifacts.add(transcript_path, 'transcript')
             console.print(f"[green]Transcript saved to {transcript_path}[/green]")
 
+    if checkpoint.complete:
+        console.print(f"[green]Reusing finished transcript from {checkpoint.path}[/green]")
+        transcript = checkpoint.text()
+        _save_transcript(transcript)
+        return transcript
+
+    with pipeline_metrics.stage('audio_download'):
+        audio_path = download_audio(url, base_name, console, video_id, artifacts)
+    if audio_path:
+        pipeline_metrics.add('bytes_downloaded', os.path.getsize(audio_path))
+        prepared = None
+        if not untranscoded:
+            with pipeline_metrics.stage('audio_transcode'):
+                prepared = prepare_audio_for_transcription(audio_path, config, console)
+        offset, tempo = 0.0, 1.0
+        with pipeline_metrics.stage('transcription'):
+            if prepared:
+                prepared_path, offset, tempo = prepared
+                artifacts.add(prepared_path, 'media')
+                transcript = transcriber.transcribe(prepared_path, console, checkpoint)
+                os.remove(prepared_path)
+                artifacts.discard(prepared_path)
+                if transcript.startswith("[Error: API transcription failed"):
+                    # The API rejected the prepared file; local errors keep their checkpoint for the next run to resume
+                    console.print("[yellow]The API rejected the prepared audio, retrying with the downloaded file[/yellow]")
+                    checkpoint = TranscriptCheckpoint(untranscoded_path, f"{transcriber.checkpoint_key()} untranscoded")
+                    artifacts.add(checkpoint.path, 'checkpoint')
+                    checkpoint.start()
+                    offset, tempo = 0.0, 1.0
+                    transcript = transcriber.transcribe(audio_path, console, checkpoint)
+            else:
+                transcript = transcriber.transcribe(audio_path, console, checkpoint)
+
+        if transcript.startswith("[Error"):
+            pipeline_metrics.add('transcription_errors')
+            # The checkpoint stays partial so the next run resumes; optionally summarize what exists
+            if config.get('use_partial_transcripts') and checkpoint.lines:
+                stopped_at = checkpoint.resume_from * tempo + offset
+                console.print(f"[yellow]Using partial transcript up to {format_clock(stopped_at)}[/yellow]")
+                transcript = (rescale_transcript_timestamps(checkpoint.text(), offset, tempo)
+                              + f"\n[Transcript incomplete: transcription stopped at {format_clock(stopped_at)}]")
+        else:
+            transcript = rescale_transcript_timestamps(transcript, offset, tempo)
+            # Final timeline, so a rerun (e.g. after an LLM failure) reuses it as-is
+            checkpoint.finish(transcript)
+
+        _save_transcript(transcript)
+
         # Clean up audio file (unless save_mode="all")
         if save_mode != "all" and os.path.exists(audio_path):
             os.remove(audio_path)
+            artifacts.discard(audio_path)
         return transcript
     return "[No transcript available]"
 
-def process_comments(data: dict, limit: int, fetch_all: bool) -> str:
-    comments = data.get('comments', [])
-    if not comments:
-        return "No comments found."
-    comments.sort(key=lambda x: x.get('like_count', 0) or 0, reverse=True)
-    count = len(comments) if fetch_all else min(limit, len(comments))
-    selected = comments[:count]
-    out = []
-    for i, c in enumerate(selected):
-        user = c.get('author', 'Anon')
-        text = c.get('text', '').replace('\n', ' ')
-        likes = c.get('like_count', 0)
-        out.append(f"{i+1}. [{likes} likes] {user}: {text}")
-    return "\n".join(out)
+# info.json fields the pipeline actually reads; everything else (formats, thumbnails, ...) is dropped on load
+METADATA_FIELDS = (
+    'id', 'title', 'description', 'duration', 'channel', 'channel_id', 'uploader',
+    'upload_date', 'timestamp', 'view_count', 'like_count', 'comment_count',
+    'language', 'webpage_url', 'tags', 'categories', 'comments',
+    'subtitles', 'automatic_captions',
+)
+# Only the language codes of these are read (resolve_subtitle_track); the per-format URL lists are dropped
+TRACK_LIST_FIELDS = ('subtitles', 'automatic_captions')
+COMMENT_FIELDS = ('id', 'parent', 'author', 'author_id', 'text', 'like_count', 'timestamp')
+
+class _JSONStream:
+    """Minimal incremental reader over a JSON text file, decoding one value at a time with the stdlib C scanner"""
+
+    _WHITESPACE = re.compile(r'[ \t\r\n]*')
+    _NUMBER_CHARS = frozenset('0123456789.eE+-')
+
+    def __init__(self, f, chunk_size: int = 1 << 20):
+        import json
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop consumed text so the buffer stays around one chunk in size
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self.pos = self._WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self._fill():
+                return self.buf[self.pos] if self.pos < len(self.buf) else ''
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Malformed JSON: expected '{char}' at offset {self.pos}, found '{found}'")
+        self.pos += 1
+
+    def value(self):
+        import json
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number near the end of the buffer may continue in the next chunk ("1." + "5e10")
+            if (isinstance(value, (int, float)) and not isinstance(value, bool) and not self.eof
+                    and (end >= len(self.buf) - 2 or self.buf[end] in self._NUMBER_CHARS) and self._fill()):
+                continue
+            self.pos = end
+            return value
 
-def generate_summary(context: str, config: dict, console) -> str:
-    if 'llm_provider' not in config:
-        raise ValueError("llm_provider must be specified in config.yaml")
-    if 'llm_model' not in config:
-        raise ValueError("llm_model must be specified in config.yaml")
-    
-    provider = config['llm_provider']
-    model = config['llm_model']
-    custom_api_base = config.get('ollama_base_url')
-    if provider == "ollama":
-        if not custom_api_base:
-            raise ValueError("ollama_base_url must be specified in config.yaml when using ollama provider")
-        model_id = f"ollama/{model}"
-        api_base = custom_api_base
-    else:
-        model_id = f"{provider}/{model}"
-        api_base = None
+def _top_comments(comments, max_comments: Optional[int], on_comment=None) -> list:
+    """
+    Keep only COMMENT_FIELDS and the max_comments most-liked comments, in most-liked-first order.
+    on_comment, if given, sees every comment before the cut (e.g. to persist all of them).
+    """
+    import heapq
 
-    system_prompt = """<persona>
-You are a Skeptical Content Archivist and Objective Observer. Your goal is to create a neutral, high-utility record of the video content.
-You prioritize accuracy over hype. You strictly distinguish between "observable facts" (what is shown) and "subjective claims" (what the speaker argues).
-</persona>
+    heap = []
+    for index, comment in enumerate(comments):
+        if not isinstance(comment, dict):
+            continue
+        if on_comment is not None:
+            on_comment(comment)
+        rank = (comment.get('like_count', 0) or 0, -index)
+        if max_comments is not None and len(heap) >= max_comments:
+            if rank <= heap[0][:2]:
+                continue
+            heapq.heappop(heap)
+        # Only comments that make the cut are copied
+        slim = {key: comment[key] for key in COMMENT_FIELDS if key in comment}
+        heapq.heappush(heap, (rank[0], rank[1], slim))
+    heap.sort(key=lambda e: (e[0], e[1]), reverse=True)
+    return [e[2] for e in heap]
+
+def _iter_streamed_comments(stream: _JSONStream):
+    stream.expect('[')
+    if stream.peek() == ']':
+        stream.pos += 1
+        return
+    while True:
+        yield stream.value()
+        separator = stream.peek()
+        stream.pos += 1
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ValueError(f"Malformed JSON: unexpected '{separator}' in comments array")
 
-<input_data>
-You will receive a raw text dump containing:
-1. Video Title & Description
-2. Transcript (Time-coded: [start -> end] Text)
-3. Top Comments (with like counts)
-</input_data>
+def load_video_metadata(json_path: str, config: dict, fields: Optional[tuple] = METADATA_FIELDS, on_comment=None) -> dict:
+    """
+    Load a yt-dlp info.json keeping only `fields` and the top comments.
 
-<processing_rules>
-1. **Attribution Anchoring (CRITICAL)**: Never state subjective metrics as absolute facts.
-   - *Bad:* "The tool is 10x faster than the competition."
-   - *Good:* "The creator argues the tool is 10x faster, demonstrating a side-by-side comparison."
-   - Use attribution verbs: "Claims," "Argues," "Suggests," "Demonstrates," "Opinions."
+    Files under json_stream_threshold_mb are decoded in one go, with msgspec
+    (typed decode that never materialises unused fields) or orjson when
+    available; larger files use a streaming parse that walks the comments
+    array one entry at a time so huge comment dumps never exist in memory as
+    Python objects.
+    """
+    import os
+
+    max_comments = config.get('max_loaded_comments')
+    if max_comments is None:
+        # A formatted comment line costs at least ~8 tokens, so more than this can never fit
+        max_comments = max(1, config.get('max_context_tokens', 65536) // 8)
+    wanted = set(fields) if fields is not None else None
+
+    def _trimmed(data: dict) -> dict:
+        if wanted is not None:
+            for key in TRACK_LIST_FIELDS:
+                if isinstance(data.get(key), dict):
+                    data[key] = dict.fromkeys(data[key])
+        return data
+
+    size_mb = os.path.getsize(json_path) / (1024 * 1024)
+    if size_mb < config.get('json_stream_threshold_mb', 16):
+        try:
+            import msgspec
+        except ImportError:
+            msgspec = None
+
+        if msgspec is not None and wanted is not None:
+            comment_type = msgspec.defstruct('Comment', [(key, Any, None) for key in COMMENT_FIELDS], omit_defaults=True)
+            info_type = msgspec.defstruct(
+                'Info',
+                [(key, Optional[list[comment_type]] if key == 'comments'
+                  else Optional[dict[str, msgspec.Raw]] if key in TRACK_LIST_FIELDS else Any, None) for key in fields],
+                omit_defaults=True,
+            )
+            with open(json_path, 'rb') as f:
+                info = msgspec.json.decode(f.read(), type=info_type)
+            data = {key: getattr(info, key) for key in fields if getattr(info, key) is not None and key != 'comments'}
+            comments = (msgspec.structs.asdict(c) for c in (info.comments or []))
+            data['comments'] = _top_comments(({k: v for k, v in c.items() if v is not None} for c in comments), max_comments, on_comment)
+            return _trimmed(data)
+
+        try:
+            import orjson
+            with open(json_path, 'rb') as f:
+                info = orjson.loads(f.read())
+        except ImportError:
+            import json
+            with open(json_path, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+        data = {key: value for key, value in info.items() if wanted is None or key in wanted}
+        data['comments'] = _top_comments(info.get('comments') or [], max_comments, on_comment)
+        return _trimmed(data)
+
+    data = {}
+    with open(json_path, 'r', encoding='utf-8') as f:
+        stream = _JSONStream(f)
+        stream.expect('{')
+        if stream.peek() == '}':
+            return {'comments': []}
+        while True:
+            key = stream.value()
+            stream.expect(':')
+            if key == 'comments' and stream.peek() == '[':
+                data['comments'] = _top_comments(_iter_streamed_comments(stream), max_comments, on_comment)
+            else:
+                value = stream.value()
+                if wanted is None or key in wanted:
+                    data[key] = value
+            separator = stream.peek()
+            stream.pos += 1
+            if separator == '}':
+                break
+            if separator != ',':
+                raise ValueError(f"Malformed JSON in {json_path}: unexpected '{separator}' after key '{key}'")
+    data.setdefault('comments', [])
+    return _trimmed(data)
+
+class CommentStore:
+    """
+    Persistent SQLite store of every comment seen, for channel-level analysis.
+
+    Comments are upserted per video (like counts change between runs), so
+    re-processing a video refreshes it instead of duplicating rows. The
+    comments table is WITHOUT ROWID, clustered on (video_id, comment_id),
+    and connections memory-map the file for fast analytical scans.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS videos (
+        video_id TEXT PRIMARY KEY,
+        channel_id TEXT,
+        channel TEXT,
+        title TEXT,
+        upload_date TEXT,
+        comment_count INTEGER,
+        stored_at REAL
+    );
+    CREATE TABLE IF NOT EXISTS comments (
+        video_id TEXT NOT NULL,
+        comment_id TEXT NOT NULL,
+        parent_id TEXT,
+        author TEXT,
+        text TEXT,
+        like_count INTEGER,
+        timestamp INTEGER,
+        PRIMARY KEY (video_id, comment_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_videos_channel ON videos(channel_id);
+    """
+    BATCH_SIZE = 5000
+    MMAP_SIZE = 1 << 30
+
+    def __init__(self, path: str):
+        import os, sqlite3
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"PRAGMA mmap_size={self.MMAP_SIZE}")
+        self.conn.executescript(self.SCHEMA)
+
+    def writer(self, video_id: str) -> "CommentWriter":
+        return CommentWriter(self, video_id)
+
+    def _write_batch(self, rows: list) -> None:
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO comments (video_id, comment_id, parent_id, author, text, like_count, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def _finish_video(self, video_id: str, data: dict, rows: list) -> None:
+        if rows:
+            self._write_batch(rows)
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO videos (video_id, channel_id, channel, title, upload_date, comment_count, stored_at) "
+                "VALUES (?, ?, ?, ?, ?, (SELECT COUNT(*) FROM comments WHERE video_id = ?), ?)",
+                (video_id, data.get('channel_id'), data.get('channel') or data.get('uploader'),
+                 data.get('title'), data.get('upload_date'), video_id, time.time()),
+            )
+            self.conn.commit()
+
+    def comment_ids(self, video_id: str) -> set:
+        """IDs of the comments already stored for a video"""
+        with self._lock:
+            return {row[0] for row in self.conn.execute("SELECT comment_id FROM comments WHERE video_id = ?", (video_id,))}
+
+    def channel_comments(self, channel_id: Optional[str] = None, video_ids: Optional[list] = None) -> dict:
+        """Column-oriented view (dict of lists) of the stored comments for a channel or set of videos"""
+        query = ("SELECT c.video_id, c.comment_id, c.parent_id, c.author, c.text, c.like_count, c.timestamp "
+                 "FROM comments c JOIN videos v ON v.video_id = c.video_id")
+        params: list = []
+        if channel_id is not None:
+            query += " WHERE v.channel_id = ?"
+            params.append(channel_id)
+        elif video_ids is not None:
+            query += f" WHERE c.video_id IN ({','.join('?' * len(video_ids))})"
+            params.extend(video_ids)
+        columns = ['video_id', 'comment_id', 'parent_id', 'author', 'text', 'like_count', 'timestamp']
+        result = {name: [] for name in columns}
+        with self._lock:
+            for row in self.conn.execute(query, params):
+                for name, value in zip(columns, row):
+                    result[name].append(value)
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
+
+class CommentWriter:
+    """Buffers one video's comments for CommentStore; pass .add as load_video_metadata's on_comment"""
+
+    def __init__(self, store: CommentStore, video_id: str):
+        self.store = store
+        self.video_id = video_id
+        self.rows = []
+        self.count = 0
+
+    def add(self, comment: dict) -> None:
+        comment_id = comment.get('id')
+        if not comment_id:
+            return
+        parent = comment.get('parent')
+        self.rows.append((
+            self.video_id,
+            comment_id,
+            None if parent in (None, 'root') else parent,
+            comment.get('author'),
+            comment.get('text'),
+            comment.get('like_count') or 0,
+            comment.get('timestamp'),
+        ))
+        self.count += 1
+        if len(self.rows) >= self.store.BATCH_SIZE:
+            self.store._write_batch(self.rows)
+            self.rows = []
+
+    def commit(self, data: dict) -> None:
+        self.store._finish_video(self.video_id, data, self.rows)
+        self.rows = []
+
+# Compact valence lexicon (roughly VADER-scaled, -4..4) for the local comment scorer
+SENTIMENT_LEXICON = {
+    # positive
+    'love': 3.2, 'loved': 2.9, 'loving': 2.9, 'amazing': 2.8, 'awesome': 3.1, 'excellent': 2.7, 'great': 3.1,
+    'good': 1.9, 'best': 3.2, 'better': 1.9, 'brilliant': 2.8, 'fantastic': 2.6, 'incredible': 2.6, 'perfect': 2.7,
+    'beautiful': 2.9, 'wonderful': 2.7, 'nice': 1.8, 'cool': 1.3, 'helpful': 1.9, 'useful': 1.9, 'clear': 1.2,
+    'thanks': 1.9, 'thank': 1.5, 'appreciate': 2.0, 'enjoyed': 2.3, 'enjoy': 2.2, 'fun': 2.3, 'funny': 1.9,
+    'interesting': 1.7, 'informative': 1.8, 'insightful': 2.0, 'impressive': 2.3, 'legend': 2.0, 'masterpiece': 3.0,
+    'happy': 2.7, 'glad': 2.0, 'recommend': 1.5, 'favorite': 2.0, 'favourite': 2.0, 'agree': 1.5, 'wow': 2.0,
+    'underrated': 1.5, 'goat': 2.0, 'respect': 2.1, 'inspiring': 2.4, 'solid': 1.5, 'fair': 1.0, 'well': 0.8,
+    'lol': 1.8, 'haha': 1.6, 'yes': 1.0, 'win': 2.0, 'works': 1.2, 'fixed': 1.0, 'clean': 1.3,
+    '❤': 2.8, '❤️': 2.8, '😍': 2.8, '😂': 1.8, '🔥': 2.0, '👍': 1.8, '👏': 2.0, '🙏': 1.6, '💯': 2.2,
+    # negative
+    'hate': -2.7, 'hated': -2.5, 'terrible': -2.5, 'awful': -2.5, 'horrible': -2.5, 'worst': -3.1, 'bad': -2.5,
+    'worse': -2.1, 'boring': -1.3, 'useless': -2.1, 'wrong': -2.1, 'stupid': -2.4, 'dumb': -2.3, 'trash': -2.4,
+    'garbage': -2.5, 'clickbait': -2.0, 'misleading': -1.9, 'scam': -2.7, 'fake': -2.1, 'lies': -2.3, 'lie': -1.9,
+    'disappointed': -1.9, 'disappointing': -2.2, 'annoying': -1.7, 'cringe': -1.8, 'sad': -2.1, 'angry': -2.3,
+    'disagree': -1.6, 'broken': -1.6, 'bug': -1.0, 'bugs': -1.0, 'slow': -1.0, 'waste': -1.8, 'overrated': -1.5,
+    'unsubscribed': -2.0, 'unsubscribe': -1.8, 'biased': -1.6, 'nonsense': -2.0, 'ridiculous': -1.7, 'fail': -2.0,
+    'failed': -2.0, 'sucks': -2.3, 'problem': -1.4, 'issue': -0.9, 'confusing': -1.3, 'ugly': -2.1,
+    '😡': -2.5, '👎': -2.0, '🤮': -2.7, '😒': -1.5, '🙄': -1.4,
+}
+NEGATION_WORDS = ('not', 'no', 'never', 'nothing', 'isnt', "isn't", 'dont', "don't", 'doesnt', "doesn't",
+                  'wasnt', "wasn't", 'cant', "can't", 'wont', "won't", 'aint', "ain't", 'without', 'hardly')
+TOPIC_STOPWORDS = frozenset("""
+about above after again against also always another anyone anything because been before being below between
+both could didn doesn doing down during each even every from further have having here into just know like
+made make many more most much must need only other over really same should since some still such than that
+their them then there these they thing things think this those through video videos very want watch watching
+what when where which while will with would your youre yours
+""".split())
+
+class CommentScorer:
+    """
+    Local, CPU-only comment sentiment and topic scorer (no LLM calls).
+
+    Comments are scored in batches: each batch is joined into one string and
+    tokenized by a single regex pass, tokens are mapped to lexicon ids, and
+    per-comment scores are summed with numpy (bincount over comment indices)
+    and squashed VADER-style to [-1, 1]. A sentiment word is flipped when one
+    of the three tokens before it in the same comment is a negation.
+    """
+
+    POLAR_THRESHOLD = 0.3
+    NEGATION_SCOPE = 3  # tokens
+    _NEGATION = -2
+    _SEPARATOR = -3
+
+    def __init__(self, batch_size: int = 20000):
+        import numpy as np
+
+        self.np = np
+        self.batch_size = batch_size
+        words = list(SENTIMENT_LEXICON)
+        self.weights = np.array([SENTIMENT_LEXICON[w] for w in words], dtype=np.float64)
+        self.codes = {word: i for i, word in enumerate(words)}
+        self.codes.update({word: self._NEGATION for word in NEGATION_WORDS})
+        self.codes['\x00'] = self._SEPARATOR
+        emoji = sorted((w for w in words if not w[0].isalnum()), key=len, reverse=True)
+        self.token_pattern = re.compile("[a-z0-9']+|\x00|" + '|'.join(re.escape(e) for e in emoji))
+        self.topic_pattern = re.compile(r"[a-z][a-z0-9+#]{3,}")
+
+    def score(self, texts: list):
+        """Return a float array of compound sentiment scores in [-1, 1], one per text"""
+        np = self.np
+        scores = np.zeros(len(texts), dtype=np.float64)
+        for start in range(0, len(texts), self.batch_size):
+            batch = [(t or '').lower().replace('\x00', ' ') for t in texts[start:start + self.batch_size]]
+            tokens = self.token_pattern.findall('\x00'.join(batch))
+            codes = np.fromiter((self.codes.get(t, -1) for t in tokens), dtype=np.int64, count=len(tokens))
+            docs = np.cumsum(codes == self._SEPARATOR)
+
+            is_negation = codes == self._NEGATION
+            negated = np.zeros(len(codes), dtype=bool)
+            for k in range(1, self.NEGATION_SCOPE + 1):
+                if k < len(codes):
+                    negated[k:] |= is_negation[:-k] & (docs[k:] == docs[:-k])
+
+            mask = codes >= 0
+            if not mask.any():
+                continue
+            values = self.weights[codes[mask]] * np.where(negated[mask], -0.74, 1.0)
+            raw = np.bincount(docs[mask], weights=values, minlength=len(batch))
+            scores[start:start + len(batch)] = raw / np.sqrt(raw * raw + 15.0)
+        return scores
+
+    def topics(self, texts: list, top_n: int = 8) -> list:
+        """Most frequent non-stopword terms, counted once per comment"""
+        from collections import Counter
+
+        counts = Counter()
+        for start in range(0, len(texts), self.batch_size):
+            for text in texts[start:start + self.batch_size]:
+                terms = set(self.topic_pattern.findall((text or '').lower())) - TOPIC_STOPWORDS
+                counts.update(terms)
+        return [term for term, _ in counts.most_common(top_n)]
+
+    def _aggregate(self, scores, likes) -> dict:
+        np = self.np
+        if len(scores) == 0:
+            return {'comments': 0, 'mean_sentiment': 0.0, 'positivity_ratio': None, 'divisiveness': 0.0,
+                    'positive_share': 0.0, 'negative_share': 0.0}
+        # Upvoted comments speak for more viewers
+        weights = 1.0 + np.log1p(np.maximum(likes, 0))
+        total = weights.sum()
+        positive = weights[scores >= self.POLAR_THRESHOLD].sum() / total
+        negative = weights[scores <= -self.POLAR_THRESHOLD].sum() / total
+        polar = positive + negative
+        return {
+            'comments': int(len(scores)),
+            'mean_sentiment': float((scores * weights).sum() / total),
+            'positivity_ratio': float(positive / polar) if polar > 0 else None,
+            # 1.0 when the audience splits evenly into strongly positive and strongly negative camps
+            'divisiveness': float(2 * min(positive, negative)),
+            'positive_share': float(positive),
+            'negative_share': float(negative),
+        }
+
+    def analyze(self, columns: dict) -> dict:
+        """Per-video and overall stats from CommentStore.channel_comments() columns"""
+        np = self.np
+        texts = columns['text']
+        scores = self.score(texts)
+        likes = np.array([like or 0 for like in columns['like_count']], dtype=np.float64)
+        video_ids = np.array(columns['video_id'], dtype=object)
+
+        # Group rows once: a stable sort by video puts each video's comments in one contiguous run
+        unique_ids, first_index, inverse = np.unique(video_ids, return_index=True, return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        groups = np.split(order, np.cumsum(np.bincount(inverse, minlength=len(unique_ids)))[:-1])
+
+        per_video = {}
+        for group in np.argsort(first_index, kind='stable'):
+            rows = groups[group]
+            stats = self._aggregate(scores[rows], likes[rows])
+            stats['topics'] = self.topics([texts[i] for i in rows], top_n=3)
+            per_video[unique_ids[group]] = stats
+
+        overall = self._aggregate(scores, likes)
+        overall['topics'] = self.topics(texts)
+        return {'overall': overall, 'videos': per_video}
+
+def describe_community(stats: dict) -> str:
+    """One-line verdict for aggregated comment stats"""
+    if not stats['comments']:
+        return "No comments analyzed"
+    ratio = stats['positivity_ratio']
+    if stats['divisiveness'] >= 0.3:
+        return "Divisive: the audience is split between strongly positive and strongly negative reactions"
+    if ratio is None:
+        return "Mostly neutral reactions"
+    if ratio >= 0.85:
+        return "Overwhelmingly positive community"
+    if ratio >= 0.65:
+        return "Mostly positive community"
+    if ratio >= 0.35:
+        return "Mixed reactions"
+    return "Mostly negative reactions"
+
+def format_comment_analytics(analytics: dict, titles: dict) -> str:
+    """Markdown section for INFO files from CommentScorer.analyze() output"""
+    def pct(value):
+        return "n/a" if value is None else f"{value:.0%}"
+
+    overall = analytics['overall']
+    lines = [
+        "## Community Analytics",
+        "",
+        f"**Verdict**: {describe_community(overall)}",
+        f"**Comments Analyzed**: {overall['comments']}",
+        f"**Positivity Ratio**: {pct(overall['positivity_ratio'])} (positive share of polarized comments)",
+        f"**Divisiveness**: {overall['divisiveness']:.2f} (0 = one-sided, 1 = evenly split)",
+        f"**Average Sentiment**: {overall['mean_sentiment']:+.2f} (like-weighted, -1 to +1)",
+        f"**Recurring Topics**: {', '.join(overall['topics']) or 'n/a'}",
+        "",
+        "| Video | Comments | Positivity | Divisiveness | Avg Sentiment | Topics |",
+        "|-------|----------|------------|--------------|---------------|--------|",
+    ]
+    for video_id, stats in analytics['videos'].items():
+        title = titles.get(video_id, video_id).replace('|', '/')
+        lines.append(f"| {title} ({video_id}) | {stats['comments']} | {pct(stats['positivity_ratio'])} | "
+                     f"{stats['divisiveness']:.2f} | {stats['mean_sentiment']:+.2f} | {', '.join(stats['topics'])} |")
+    return "\n".join(lines) + "\n"
+
+class SearchIndex:
+    """
+    Local SQLite FTS5 index of processed videos for keyword search.
+
+    Each video contributes its title, summary sections, transcript windows
+    (with start times in ms) and top comments. Rows get rowids in a block
+    reserved for their video, so re-indexing a video replaces its rows with
+    a rowid range delete instead of a scan.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS videos (
+        id INTEGER PRIMARY KEY,
+        video_id TEXT UNIQUE NOT NULL,
+        title TEXT,
+        channel TEXT,
+        source TEXT,
+        summary_path TEXT,
+        indexed_at REAL
+    );
+    CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(
+        video_id UNINDEXED,
+        kind UNINDEXED,
+        start_ms UNINDEXED,
+        section,
+        text,
+        tokenize = 'porter unicode61'
+    );
+    """
+    ROWS_PER_VIDEO = 1 << 20
+    KINDS = ('title', 'summary', 'transcript', 'comment')
+
+    def __init__(self, path: str, window_seconds: float = 30, max_comments: int = 100):
+        import os, sqlite3
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.window_seconds = window_seconds
+        self.max_comments = max_comments
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+
+    def add_video(self, video_id: str, data: dict, transcript: str, summary: str,
+                  source: Optional[str] = None, summary_path: Optional[str] = None) -> int:
+        """(Re-)index one video; returns the number of rows written"""
+        title = data.get('title') or ''
+        rows = [('title', None, '', title)]
+        for block in re.split(r'^###\s+', summary or '', flags=re.MULTILINE):
+            heading, _, body = block.partition('\n')
+            if body.strip():
+                rows.append(('summary', None, heading.strip(), body.strip()))
+        rows += [('transcript', start_ms, '', text) for start_ms, text in transcript_windows(transcript or '', self.window_seconds)]
+        for comment in (data.get('comments') or [])[:self.max_comments]:
+            if comment.get('text'):
+                rows.append(('comment', None, comment.get('author') or '', comment['text']))
+        rows = rows[:self.ROWS_PER_VIDEO]
+
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO videos (video_id, title, channel, source, summary_path, indexed_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(video_id) DO UPDATE SET title = excluded.title, channel = excluded.channel, "
+                "source = excluded.source, summary_path = excluded.summary_path, indexed_at = excluded.indexed_at",
+                (video_id, title, data.get('channel') or data.get('uploader'), source, summary_path, time.time()),
+            )
+            key = self.conn.execute("SELECT id FROM videos WHERE video_id = ?", (video_id,)).fetchone()[0]
+            base = key * self.ROWS_PER_VIDEO
+            self.conn.execute("DELETE FROM docs WHERE rowid >= ? AND rowid < ?", (base, base + self.ROWS_PER_VIDEO))
+            self.conn.executemany(
+                "INSERT INTO docs (rowid, video_id, kind, start_ms, section, text) VALUES (?, ?, ?, ?, ?, ?)",
+                [(base + n, video_id, kind, start_ms, section, text) for n, (kind, start_ms, section, text) in enumerate(rows)],
+            )
+        return len(rows)
+
+    def search(self, query: str, limit: int = 20, kinds: Optional[list] = None, channel: Optional[str] = None) -> list:
+        """Ranked hits (best first) as dicts with video_id, title, kind, section, start_ms, snippet and score"""
+        import sqlite3
+
+        sql = ("SELECT d.video_id, v.title, v.channel, d.kind, d.section, d.start_ms, "
+               "snippet(docs, 4, '[', ']', '...', 16), bm25(docs, 0, 0, 0, 0.5, 1.0) AS score "
+               "FROM docs d JOIN videos v ON v.video_id = d.video_id WHERE docs MATCH ?")
+        params: list = []
+        if kinds:
+            sql += f" AND d.kind IN ({','.join('?' * len(kinds))})"
+            params.extend(kinds)
+        if channel:
+            sql += " AND v.channel = ?"
+            params.append(channel)
+        sql += " ORDER BY score LIMIT ?"
+
+        try:
+            rows = self.conn.execute(sql, [query] + params + [limit]).fetchall()
+        except sqlite3.OperationalError:
+            # Not valid FTS5 syntax (stray quotes, operators): search the words literally
+            quoted = " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+            rows = self.conn.execute(sql, [quoted] + params + [limit]).fetchall()
+
+        columns = ['video_id', 'title', 'channel', 'kind', 'section', 'start_ms', 'snippet', 'score']
+        return [dict(zip(columns, row)) for row in rows]
+
+    def close(self) -> None:
+        self.conn.close()
+
+class EmbeddingIndex:
+    """
+    Memory-mapped vector index of transcript chunks for semantic search.
+
+    Transcripts are cut into windows of chunk_seconds and embedded on the CPU
+    with a small fastembed (ONNX) model. Vectors are appended to a raw float32
+    file that is searched through np.memmap, so the index never has to fit in
+    memory. Once it holds ANN_MIN_ROWS chunks, vectors are clustered with
+    spherical k-means and a query only scores the chunks in its `probe`
+    nearest clusters (IVF); the clustering is retrained whenever the index has
+    doubled since the last training. Chunk metadata and the row count live in
+    SQLite, whose write lock also serializes concurrent writers.
+
+    Re-adding a video tombstones its old rows (cluster id -1) instead of
+    rewriting the vector file.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS chunks (
+        row INTEGER PRIMARY KEY,
+        video_id TEXT NOT NULL,
+        start_ms INTEGER,
+        text TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_chunks_video ON chunks(video_id);
+    CREATE TABLE IF NOT EXISTS videos (
+        video_id TEXT PRIMARY KEY,
+        title TEXT,
+        channel TEXT
+    );
+    CREATE TABLE IF NOT EXISTS info (
+        key TEXT PRIMARY KEY,
+        value
+    );
+    """
+    DEFAULT_MODEL = "BAAI/bge-small-en-v1.5"
+    ANN_MIN_ROWS = 4096
+    KMEANS_ITERATIONS = 10
+    KMEANS_SAMPLE = 65536
+
+    def __init__(self, directory: str, model_name: Optional[str] = None, chunk_seconds: float = 60,
+                 batch_size: int = 64, probe: int = 8):
+        import os, sqlite3
+        import numpy as np
+
+        self.np = np
+        self.directory = directory
+        self.chunk_seconds = chunk_seconds
+        self.batch_size = batch_size
+        self.probe = probe
+        self._model = None
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.lists_path = os.path.join(directory, "lists.i32")
+        self.centroids_path = os.path.join(directory, "centroids.npy")
+
+        self.conn = sqlite3.connect(os.path.join(directory, "chunks.sqlite"), isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self.SCHEMA)
+        stored_model = self._info('model')
+        if stored_model and model_name and stored_model != model_name:
+            raise ValueError(f"{directory} was built with {stored_model}, not {model_name}; use another embedding_index_dir")
+        self.model_name = stored_model or model_name or self.DEFAULT_MODEL
+
+    def _info(self, key: str, default=None):
+        row = self.conn.execute("SELECT value FROM info WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_info(self, key: str, value) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO info (key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def model(self):
+        if self._model is None:
+            from fastembed import TextEmbedding
+            self._model = TextEmbedding(model_name=self.model_name)
+        return self._model
+
+    def _normalize(self, vectors):
+        np = self.np
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def embed(self, texts: list):
+        """Unit-length float32 embeddings, one row per text"""
+        return self._normalize(list(self.model.embed(texts, batch_size=self.batch_size)))
+
+    def _embed_query(self, query: str):
+        embed = getattr(self.model, 'query_embed', self.model.embed)
+        return self._normalize(list(embed([query])))[0]
+
+    def _open(self, rows: int, dim: int):
+        """(vectors, lists) memmaps over the first `rows` committed rows"""
+        np = self.np
+        if not rows:
+            return np.zeros((0, dim), dtype=np.float32), np.zeros(0, dtype=np.int32)
+        vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(rows, dim))
+        lists = np.memmap(self.lists_path, dtype=np.int32, mode='r', shape=(rows,))
+        return vectors, lists
+
+    def _load_centroids(self):
+        import os
+        return self.np.load(self.centroids_path) if os.path.exists(self.centroids_path) else None
+
+    def _assign(self, vectors, centroids):
+        """Nearest centroid id per vector, in blocks to bound the temporary score matrix"""
+        np = self.np
+        out = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), 16384):
+            out[start:start + 16384] = np.argmax(vectors[start:start + 16384] @ centroids.T, axis=1)
+        return out
+
+    def add_video(self, video_id: str, transcript: str, data: Optional[dict] = None) -> int:
+        """
+        Embed a video's transcript chunks and (re)place them in the index; returns the chunk count.
+        Only timestamped windows are embedded, so a placeholder such as "[No transcript available]"
+        leaves the video's existing chunks alone.
+        """
+        np = self.np
+        data = data or {}
+        windows = [(start_ms, text) for start_ms, text in transcript_windows(transcript or '', self.chunk_seconds)
+                   if start_ms is not None and text.strip()]
+        if not windows:
+            return 0
+        # Embedding is the slow part, so do it before taking the write lock
+        vectors = self.embed([text for _, text in windows])
+        dim = vectors.shape[1]
+
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self._info('rows', 0)
+            stored_dim = self._info('dim')
+            if stored_dim and stored_dim != dim:
+                raise ValueError(f"embedding size {dim} does not match the index ({stored_dim})")
+
+            # Drop bytes a crashed writer may have appended past the committed rows
+            with open(self.vectors_path, 'ab') as f:
+                f.truncate(rows * dim * 4)
+            with open(self.lists_path, 'ab') as f:
+                f.truncate(rows * 4)
+
+            old_rows = [r for (r,) in self.conn.execute("SELECT row FROM chunks WHERE video_id = ?", (video_id,))]
+            if old_rows:
+                lists = np.memmap(self.lists_path, dtype=np.int32, mode='r+', shape=(rows,))
+                lists[old_rows] = -1
+                lists.flush()
+                del lists
+                self.conn.execute("DELETE FROM chunks WHERE video_id = ?", (video_id,))
+
+            centroids = self._load_centroids()
+            assignments = self._assign(vectors, centroids) if centroids is not None else np.zeros(len(vectors), dtype=np.int32)
+            with open(self.vectors_path, 'ab') as f:
+                f.write(vectors.tobytes())
+            with open(self.lists_path, 'ab') as f:
+                f.write(assignments.tobytes())
+
+            self.conn.executemany("INSERT INTO chunks (row, video_id, start_ms, text) VALUES (?, ?, ?, ?)",
+                                  [(rows + n, video_id, start_ms, text) for n, (start_ms, text) in enumerate(windows)])
+            self.conn.execute("INSERT OR REPLACE INTO videos (video_id, title, channel) VALUES (?, ?, ?)",
+                              (video_id, data.get('title'), data.get('channel') or data.get('uploader')))
+            rows += len(windows)
+            self._set_info('rows', rows)
+            self._set_info('dim', dim)
+            self._set_info('model', self.model_name)
+
+            trained = self._info('trained_rows', 0)
+            if rows >= self.ANN_MIN_ROWS and rows >= 2 * trained:
+                self._train(rows, dim)
+                self._set_info('trained_rows', rows)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return len(windows)
+
+    def _train(self, rows: int, dim: int) -> None:
+        """Spherical k-means over (a sample of) the live vectors, then reassign every row"""
+        import os
+        np = self.np
+        vectors, lists = self._open(rows, dim)
+        live = np.flatnonzero(np.asarray(lists) >= 0)
+        rng = np.random.default_rng(0)
+        sample = np.asarray(vectors[np.sort(rng.choice(live, min(len(live), self.KMEANS_SAMPLE), replace=False))])
+        k = max(1, int(np.sqrt(len(live))))
+        centroids = sample[rng.choice(len(sample), k, replace=False)]
+        for _ in range(self.KMEANS_ITERATIONS):
+            labels = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]
+            centroids = self._normalize(sums)
+
+        assignments = np.full(rows, -1, dtype=np.int32)
+        assignments[live] = self._assign(np.asarray(vectors[live]), centroids)
+        del vectors, lists
+        # Write next to the live files and swap them in, so readers never see a half-written list
+        np.save(self.centroids_path + ".tmp.npy", centroids)
+        assignments.tofile(self.lists_path + ".tmp")
+        os.replace(self.lists_path + ".tmp", self.lists_path)
+        os.replace(self.centroids_path + ".tmp.npy", self.centroids_path)
+
+    def search(self, query: str, limit: int = 20, channel: Optional[str] = None) -> list:
+        """Nearest transcript chunks (best first) as dicts with video_id, title, start_ms, snippet and score"""
+        np = self.np
+        rows, dim = self._info('rows', 0), self._info('dim')
+        if not rows:
+            return []
+        vectors, lists = self._open(rows, dim)
+        q = self._embed_query(query)
+
+        centroids = self._load_centroids()
+        if centroids is not None and self.probe < len(centroids):
+            probe = np.argsort(centroids @ q)[::-1][:self.probe]
+            candidates = np.flatnonzero(np.isin(lists, probe))
+        else:
+            candidates = np.flatnonzero(np.asarray(lists) >= 0)
+
+        sql = ("SELECT c.row, c.video_id, v.title, v.channel, c.start_ms, c.text FROM chunks c "
+               "JOIN videos v ON v.video_id = c.video_id WHERE c.row = ?")
+        if channel:
+            sql += " AND v.channel = ?"
+        hits = []
+        scores = np.asarray(vectors[candidates]) @ q if len(candidates) else np.zeros(0, dtype=np.float32)
+        # Walk candidates best first until `limit` of them pass the channel filter
+        for i in np.argsort(scores)[::-1]:
+            row = self.conn.execute(sql, (int(candidates[i]),) + ((channel,) if channel else ())).fetchone()
+            if row is None:
+                continue
+            _, video_id, title, video_channel, start_ms, text = row
+            snippet = text if len(text) <= 200 else text[:197] + "..."
+            hits.append({'video_id': video_id, 'title': title, 'channel': video_channel, 'kind': 'transcript',
+                         'section': '', 'start_ms': start_ms, 'snippet': snippet, 'score': float(scores[i])})
+            if len(hits) >= limit:
+                break
+        return hits
+
+    def close(self) -> None:
+        self.conn.close()
+
+def process_comments(data: dict, limit: int, fetch_all: bool) -> str:
+    comments = data.get('comments', [])
+    if not comments:
+        return "No comments found."
+    comments.sort(key=lambda x: x.get('like_count', 0) or 0, reverse=True)
+    count = len(comments) if fetch_all else min(limit, len(comments))
+    selected = comments[:count]
+    out = []
+    for i, c in enumerate(selected):
+        user = c.get('author', 'Anon')
+        text = c.get('text', '').replace('\n', ' ')
+        likes = c.get('like_count', 0)
+        out.append(f"{i+1}. [{likes} likes] {user}: {text}")
+    return "\n".join(out)
+
+def llm_usage(response) -> tuple:
+    """(prompt_tokens, completion_tokens) from a LiteLLM response; None for counts it doesn't report"""
+    usage = getattr(response, "usage", None)
+    if usage is None and isinstance(response, dict):
+        usage = response.get("usage")
+    if usage is None:
+        return None, None
+    if isinstance(usage, dict):
+        prompt_tokens = usage.get("prompt_tokens")
+        completion_tokens = usage.get("completion_tokens")
+    else:
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+    return (prompt_tokens if isinstance(prompt_tokens, int) else None,
+            completion_tokens if isinstance(completion_tokens, int) else None)
+
+def record_llm_usage(response) -> None:
+    """Feed prompt/completion token counts from a LiteLLM response into pipeline metrics"""
+    prompt_tokens, completion_tokens = llm_usage(response)
+    if isinstance(prompt_tokens, int):
+        pipeline_metrics.add('tokens_in', prompt_tokens)
+    if isinstance(completion_tokens, int):
+        pipeline_metrics.add('tokens_out', completion_tokens)
+
+# Keys an llm_tiers entry may override for the videos it matches
+LLM_TIER_KEYS = ('llm_provider', 'llm_model', 'ollama_base_url', 'max_context_tokens', 'llm_max_tokens', 'llm_timeout')
+
+def select_llm_tier(config: dict, duration: Optional[float], transcript_tokens: Optional[int]) -> dict:
+    """Return config with the first matching llm_tiers entry applied (tiers are checked in order)"""
+    for tier in config.get('llm_tiers') or []:
+        max_duration = tier.get('max_duration')
+        max_transcript_tokens = tier.get('max_transcript_tokens')
+        # An unknown duration/token count never matches a tier that limits it
+        if max_duration is not None and (not duration or duration > max_duration):
+            continue
+        if max_transcript_tokens is not None and (transcript_tokens is None or transcript_tokens > max_transcript_tokens):
+            continue
+        tier_config = dict(config)
+        tier_config.update({key: tier[key] for key in LLM_TIER_KEYS if key in tier})
+        tier_config['llm_tier'] = tier.get('name', tier_config['llm_model'])
+        return tier_config
+    return config
+
+SUMMARY_SYSTEM_PROMPT = """<persona>
+You are a Skeptical Content Archivist and Objective Observer. Your goal is to create a neutral, high-utility record of the video content.
+You prioritize accuracy over hype. You strictly distinguish between "observable facts" (what is shown) and "subjective claims" (what the speaker argues).
+</persona>
+
+<input_data>
+You will receive a raw text dump containing:
+1. Video Title & Description
+2. Transcript (Time-coded: [MM:SS] paragraphs or [start -> end] lines; "[...]" marks skipped stretches of a long video)
+3. Top Comments (with like counts)
+</input_data>
+
+<processing_rules>
+1. **Attribution Anchoring (CRITICAL)**: Never state subjective metrics as absolute facts.
+   - *Bad:* "The tool is 10x faster than the competition."
+   - *Good:* "The creator argues the tool is 10x faster, demonstrating a side-by-side comparison."
+   - Use attribution verbs: "Claims," "Argues," "Suggests," "Demonstrates," "Opinions."
 
 2. **Timestamp Integration**: For every "Key Insight," you MUST cite the approximate timestamp `(Time: MM:SS)` from the transcript where the point is discussed.
 
@@ -922,8 +3170,82 @@ You MUST strictly follow this Markdown structure. Do not output anything else.
 </output_format>
 """
 
+# Appended to the system prompt when several short videos share one request
+PACKED_SUMMARY_PROMPT = """
+<packed_input>
+This request contains several unrelated videos, each wrapped in <video id="..."> ... </video>.
+Summarize every video on its own; never carry facts, timestamps or comments over from one video to another.
+For each video, in the order given, output a line `## VIDEO <id>` followed by that video's summary in exactly the output_format above.
+Do not output anything before the first `## VIDEO` line.
+</packed_input>
+"""
+_PACKED_HEADING = re.compile(r'^##\s*VIDEO\s+`?([A-Za-z0-9_-]+)`?\s*$', re.MULTILINE)
+
+def _llm_target(config: dict) -> tuple:
+    """(LiteLLM model id, api_base) for the configured provider"""
+    if 'llm_provider' not in config:
+        raise ValueError("llm_provider must be specified in config.yaml")
+    if 'llm_model' not in config:
+        raise ValueError("llm_model must be specified in config.yaml")
+    
+    provider = config['llm_provider']
+    model = config['llm_model']
+    custom_api_base = config.get('ollama_base_url')
+    if provider == "ollama":
+        if not custom_api_base:
+            raise ValueError("ollama_base_url must be specified in config.yaml when using ollama provider")
+        return f"ollama/{model}", custom_api_base
+    return f"{provider}/{model}", None
+
+def _completion_kwargs(config: dict, max_tokens_scale: int = 1) -> dict:
+    completion_kwargs = {}
+    if config.get('llm_max_tokens'):
+        completion_kwargs['max_tokens'] = int(config['llm_max_tokens']) * max_tokens_scale
+    if config.get('llm_timeout'):
+        completion_kwargs['timeout'] = float(config['llm_timeout'])
+    return completion_kwargs
+
+def _response_text(response) -> str:
+    """Safely extract content from different response shapes (object-like or dict-like)"""
+    try:
+        # object-like (e.g., response.choices[0].message.content)
+        choices = getattr(response, "choices", None)
+        if choices and len(choices) > 0:
+            first = choices[0]
+            msg = getattr(first, "message", None)
+            if msg:
+                content = getattr(msg, "content", None)
+                if isinstance(content, str):
+                    return content
+        # dict-like
+        if isinstance(response, dict):
+            choices = response.get("choices")
+            if choices and isinstance(choices, list) and len(choices) > 0:
+                first = choices[0]
+                if isinstance(first, dict):
+                    msg = first.get("message") or {}
+                    content = msg.get("content")
+                    if isinstance(content, str):
+                        return content
+    except Exception:
+        pass
+    return str(response)
+
+def _finish_reason(response) -> Optional[str]:
+    """finish_reason of the first choice ('length' when max_tokens cut the output off), if reported"""
+    choices = getattr(response, "choices", None)
+    if choices is None and isinstance(response, dict):
+        choices = response.get("choices")
+    if not choices:
+        return None
+    first = choices[0]
+    return first.get("finish_reason") if isinstance(first, dict) else getattr(first, "finish_reason", None)
+
+def generate_summary(context: str, config: dict, console) -> str:
+    model_id, api_base = _llm_target(config)
+
     messages = [
-        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
         {"role": "user", "content": context}
     ]
 
@@ -934,97 +3256,793 @@ You MUST strictly follow this Markdown structure. Do not output anything else.
         return "[LLM unavailable: litellm package missing]"
 
     console.print(f"[blue]Requesting summary from {model_id}...[/blue]")
+    pipeline_metrics.label('llm_model', model_id)
     try:
-        response = completion(model=model_id, messages=messages, api_base=api_base)
-        # Safely extract content from different response shapes (object-like or dict-like)
-        try:
-            # object-like (e.g., response.choices[0].message.content)
-            choices = getattr(response, "choices", None)
-            if choices and len(choices) > 0:
-                first = choices[0]
-                msg = getattr(first, "message", None)
-                if msg:
-                    content = getattr(msg, "content", None)
-                    if isinstance(content, str):
-                        return content
-            # dict-like
-            if isinstance(response, dict):
-                choices = response.get("choices")
-                if choices and isinstance(choices, list) and len(choices) > 0:
-                    first = choices[0]
-                    if isinstance(first, dict):
-                        msg = first.get("message") or {}
-                        content = msg.get("content")
-                        if isinstance(content, str):
-                            return content
-        except Exception:
-            pass
-        return str(response)
+        response = completion(model=model_id, messages=messages, api_base=api_base, **_completion_kwargs(config))
+        record_llm_usage(response)
+        return _response_text(response)
     except Exception as e:
+        pipeline_metrics.add('llm_errors')
         return f"LLM Error: {str(e)}"
 
-def cleanup_files(base_name: str, save_mode: Optional[str], console) -> None:
+def generate_packed_summaries(contexts: list, config: dict, console) -> tuple:
+    """
+    Summarize several short videos in one completion call.
+
+    contexts is a list of (video_id, context). Returns ({video_id: summary},
+    (prompt_tokens, completion_tokens)); videos missing from the response (or
+    cut off by max_tokens, or every video if the call fails) are left out so the caller can summarize
+    them one by one. Usage is returned rather than recorded because the
+    videos' metric records are suspended while they wait for the pack.
+    """
+    model_id, api_base = _llm_target(config)
+    try:
+        from litellm import completion
+    except Exception:
+        console.print("[red]litellm not installed; skipping LLM call.[/red]")
+        return {}, (None, None)
+
+    user_content = "\n\n".join(f'<video id="{video_id}">\n{context}\n</video>' for video_id, context in contexts)
+    messages = [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT + PACKED_SUMMARY_PROMPT},
+        {"role": "user", "content": user_content}
+    ]
+
+    console.print(f"[blue]Requesting {len(contexts)} packed summaries from {model_id}...[/blue]")
+    try:
+        response = completion(model=model_id, messages=messages, api_base=api_base,
+                              **_completion_kwargs(config, max_tokens_scale=len(contexts)))
+    except Exception as e:
+        console.print(f"[yellow]Packed request failed, summarizing videos one by one: {e}[/yellow]")
+        return {}, (None, None)
+
+    text = _response_text(response)
+    wanted = {video_id for video_id, _ in contexts}
+    summaries = {}
+    headings = list(_PACKED_HEADING.finditer(text))
+    if headings and _finish_reason(response) == 'length':
+        # max_tokens cut off the last section; that video is summarized on its own instead
+        console.print(f"[yellow]Packed response was truncated; {headings[-1].group(1)} will be summarized separately[/yellow]")
+        text = text[:headings[-1].start()]
+        headings.pop()
+    for index, match in enumerate(headings):
+        end = headings[index + 1].start() if index + 1 < len(headings) else len(text)
+        body = text[match.end():end].strip()
+        if match.group(1) in wanted and body:
+            summaries[match.group(1)] = body
+    return summaries, llm_usage(response)
+
+# Between the summary and the context it was generated from in SUMMARY_{id}.md
+RAW_DATA_SEPARATOR = "\n\n" + "="*30 + "\nRAW DATA\n" + "="*30 + "\n"
+COMMUNITY_HEADING = "Community Intelligence"
+
+COMMUNITY_REFRESH_PROMPT = """<persona>
+You are a Skeptical Content Archivist updating the community section of an existing video record.
+</persona>
+
+<input_data>
+You will receive:
+1. The existing summary of the video's content (for context only; do not repeat it)
+2. The previous "Community Intelligence" section
+3. Comments posted since that section was written (with like counts)
+</input_data>
+
+<processing_rules>
+1. Merge the new comments into the previous section: keep themes that still hold, update the mood and ratios, and add new themes, disputes and tips.
+2. Never state commenters' claims as facts; attribute them ("argues", "claims", "suggests").
+3. If the new comments shift the overall reaction, say so in the Overall line (e.g. "Initially positive; recent comments are more critical").
+</processing_rules>
+
+<output_format>
+Output ONLY the updated section, starting with the heading, in exactly this structure:
+
+### Community Intelligence
+**Overall**: [Summary of the general mood: Positive, Negative, or Mixed. Mention the approximate ratio.]
+
+**Positive Highlights**:
+- [Theme]: [Quote or summary] (approx [X] likes)
+
+**Criticisms/Negatives**:
+- [Theme]: [Quote or summary] (approx [X] likes)
+
+**Community Knowledge (Corrections, Disputes, & Tips)**
+*(Only include this subsection if applicable. If no valid data exists, omit it.)*
+- **[Correction/Dispute]**: [User Name] disputes the claim that [X], noting [Y].
+- **[Additive Tip]**: [User Name] suggests a workaround for [Problem] using [Tool/Method].
+</output_format>
+"""
+
+def _section_span(summary: str, heading: str) -> Optional[tuple]:
+    """(start, end) of a '### heading' section, up to the next '### ' heading or the end"""
+    match = re.search(rf'^###\s+{re.escape(heading)}\s*$', summary, re.MULTILINE)
+    if match is None:
+        return None
+    following = re.search(r'^###\s', summary[match.end():], re.MULTILINE)
+    return match.start(), match.end() + following.start() if following else len(summary)
+
+def summary_section(summary: str, heading: str) -> Optional[str]:
+    span = _section_span(summary, heading)
+    return summary[span[0]:span[1]].strip() if span else None
+
+def replace_summary_section(summary: str, heading: str, section: str) -> str:
+    """Swap one '### heading' section for `section` (appended when the summary has none)"""
+    span = _section_span(summary, heading)
+    if span is None:
+        return summary.rstrip() + "\n\n" + section.strip() + "\n"
+    start, end = span
+    tail = summary[end:]
+    return summary[:start] + section.strip() + ("\n\n" + tail.lstrip() if tail.strip() else "\n")
+
+def generate_community_update(video_summary: str, previous_section: str, new_comments: str, config: dict, console) -> str:
+    """Rewrite only the Community Intelligence section from the previous one plus new comments; raises on LLM failure"""
+    model_id, api_base = _llm_target(config)
+    from litellm import completion
+
+    messages = [
+        {"role": "system", "content": COMMUNITY_REFRESH_PROMPT},
+        {"role": "user", "content": f"VIDEO SUMMARY:\n{video_summary}\n\nPREVIOUS SECTION:\n{previous_section}\n\nNEW COMMENTS:\n{new_comments}"}
+    ]
+    console.print(f"[blue]Requesting community update from {model_id}...[/blue]")
+    pipeline_metrics.label('llm_model', model_id)
+    try:
+        response = completion(model=model_id, messages=messages, api_base=api_base, **_completion_kwargs(config))
+    except Exception:
+        pipeline_metrics.add('llm_errors')
+        raise
+    record_llm_usage(response)
+    section = _response_text(response).strip()
+    if summary_section(section, COMMUNITY_HEADING) is None:
+        raise ValueError("LLM response has no Community Intelligence section")
+    return summary_section(section, COMMUNITY_HEADING)
+
+def cleanup_files(base_name: str, save_mode: Optional[str], console, artifacts: Optional[VideoArtifacts] = None) -> None:
     """Clean up files based on save mode"""
-    if save_mode == "all":
-        # Keep everything
-        return
-    
-    import glob
     import os
+
+    if artifacts is None:
+        artifacts = VideoArtifacts(base_name)
     
-    def _remove_files(patterns: list):
-        """Helper function to remove files matching patterns"""
-        for pattern in patterns:
-            files = glob.glob(pattern)
-            for file_path in files:
-                # Don't remove the summary file
-                if "SUMMARY_" in os.path.basename(file_path):
-                    continue
-                try:
-                    os.remove(file_path)
-                except (PermissionError, FileNotFoundError, OSError) as e:
-                    console.print(f"[red]Error removing {file_path}: {e}[/red]")
+    def _remove_files(kinds: tuple):
+        """Helper function to remove the registered files of the given kinds"""
+        for file_path in artifacts.files(kinds):
+            # Don't remove the summary file
+            if "SUMMARY_" in os.path.basename(file_path):
+                continue
+            try:
+                os.remove(file_path)
+                artifacts.discard(file_path)
+            except (PermissionError, FileNotFoundError, OSError) as e:
+                console.print(f"[red]Error removing {file_path}: {e}[/red]")
     
-    if not save_mode:
+    if save_mode == "all":
+        # Keep everything except the transcription checkpoint, which only matters until the video succeeds
+        _remove_files(('checkpoint',))
+
+    elif not save_mode:
         # Default: clean up everything except summary
-        patterns_to_clean = [
-            f"{base_name}*.info.json",
-            f"{base_name}*.vtt",
-            f"{base_name}_transcript.txt", 
-            f"{base_name}*.comments.json",
-            f"{base_name}",     # Video file without extension
-            f"{base_name}.*"    # Other files with extensions
-        ]
-        _remove_files(patterns_to_clean)
+        _remove_files(('info', 'subtitle', 'transcript', 'checkpoint', 'media'))
         
     elif save_mode == "meta":
-        # Keep: .info.json, .vtt, _transcript.txt, .comments.json
-        # Remove: video files
-        patterns_to_clean = [
-            f"{base_name}",         # Video file without extension
-            f"{base_name}.mp4",     # Common video extensions
-            f"{base_name}.webm", 
-            f"{base_name}.mkv",
-            f"{base_name}.avi",
-            f"{base_name}.m4a",
-            f"{base_name}.mp3",
-            f"{base_name}.opus"
-        ]
-        _remove_files(patterns_to_clean)
+        # Keep: .info.json, .vtt, _transcript.txt
+        # Remove: video/audio files and the transcription checkpoint
+        _remove_files(('media', 'checkpoint'))
         
     elif save_mode == "video":
         # Keep: video file only  
         # Remove: everything else
-        patterns_to_clean = [
-            f"{base_name}*.info.json",
-            f"{base_name}*.vtt",
-            f"{base_name}_transcript.txt",
-            f"{base_name}*.comments.json"
-        ]
-        _remove_files(patterns_to_clean)
+        _remove_files(('info', 'subtitle', 'transcript', 'checkpoint'))
+
+def mirror_artifacts(base_name: str, summary_path: str, target_dirs: list, console, artifacts: Optional[VideoArtifacts] = None) -> None:
+    """Hardlink (or copy, across filesystems) a finished video's artifacts into other source directories"""
+    import os
+
+    if artifacts is None:
+        artifacts = VideoArtifacts(base_name)
+    files = [summary_path] + artifacts.files()
+    for target_dir in target_dirs:
+        os.makedirs(target_dir, exist_ok=True)
+        for src in files:
+            dst = os.path.join(target_dir, os.path.basename(src))
+            if os.path.abspath(dst) == os.path.abspath(src):
+                continue
+            try:
+                if os.path.exists(dst):
+                    os.remove(dst)
+                _link_or_copy(src, dst)
+            except OSError as e:
+                console.print(f"[red]Error mirroring {src} to {target_dir}: {e}[/red]")
+        console.print(f"[green]Linked results into {target_dir}[/green]")
+
+# Rough speech density used for planning (~150 spoken words/min at ~1.3 tokens/word)
+SPOKEN_TOKENS_PER_SECOND = 3.3
+# Per-minute audio transcription prices in USD
+TRANSCRIPTION_COST_PER_MINUTE = {'local': 0.0, 'openai': 0.006, 'groq': 0.111 / 60}
+
+def estimate_video_cost(duration: Optional[float], config: dict, needs_transcription: bool) -> dict:
+    """Estimate tokens and USD cost for one video from its listing duration (no network or heavy imports)"""
+    max_tokens = config.get('max_context_tokens', 65536)
+    estimate = {'duration': duration, 'input_tokens': None, 'transcription_cost': None, 'llm_cost': None}
+    if not duration:
+        return estimate
+
+    # Transcript plus title/description/comments and the system prompt
+    input_tokens = min(max_tokens, int(duration * SPOKEN_TOKENS_PER_SECOND) + 3000)
+    output_tokens = min(1500, config.get('llm_max_tokens') or 1500)
+    estimate['input_tokens'] = input_tokens
+
+    provider = config.get('transcription_provider', 'local').lower()
+    if needs_transcription:
+        estimate['transcription_cost'] = duration / 60 * TRANSCRIPTION_COST_PER_MINUTE.get(provider, 0.0)
+    else:
+        estimate['transcription_cost'] = 0.0
+
+    input_price = config.get('llm_input_cost_per_million')
+    output_price = config.get('llm_output_cost_per_million')
+    if input_price is not None or output_price is not None:
+        estimate['llm_cost'] = (input_tokens * (input_price or 0) + output_tokens * (output_price or 0)) / 1_000_000
+    return estimate
+
+def print_work_plan(processing_items: list, config: dict, args, console) -> None:
+    """Print the expanded work queue with per-video and total cost estimates"""
+    console.rule("[bold blue]Work Plan")
+    totals = {'duration': 0.0, 'input_tokens': 0, 'transcription_cost': 0.0, 'llm_cost': 0.0}
+    unknown_duration = 0
+    has_llm_pricing = False
+    tier_counts: dict[str, int] = {}
+
+    for index, item in enumerate(processing_items, 1):
+        duration = item.get('duration')
+        video_config = select_llm_tier(config, duration, int(duration * SPOKEN_TOKENS_PER_SECOND) if duration else None)
+        tier = str(video_config.get('llm_tier', f"{video_config.get('llm_provider')}/{video_config.get('llm_model')}"))
+        tier_counts[tier] = tier_counts.get(tier, 0) + 1
+        # Subtitles usually exist, so only --no-subtitles is costed as a transcription
+        estimate = estimate_video_cost(duration, video_config, needs_transcription=args.no_subtitles)
+        targets = [item['output_dir']] + [m['output_dir'] for m in item.get('mirrors', [])]
+        if estimate['duration']:
+            minutes, seconds = divmod(int(estimate['duration']), 60)
+            length = f"{minutes}:{seconds:02d}"
+            totals['duration'] += estimate['duration']
+            totals['input_tokens'] += estimate['input_tokens']
+            totals['transcription_cost'] += estimate['transcription_cost']
+            if estimate['llm_cost'] is not None:
+                has_llm_pricing = True
+                totals['llm_cost'] += estimate['llm_cost']
+            tokens = f"~{estimate['input_tokens']} tokens"
+        else:
+            unknown_duration += 1
+            length = "?:??"
+            tokens = "tokens unknown"
+        if config.get('llm_tiers'):
+            tokens += f", {tier}"
+        console.print(f"{index:>4}. {item['video_id']} [{length}] {item['video_title']} -> {', '.join(targets)} ({tokens})")
+
+    console.rule("[bold blue]Estimated Totals")
+    hours = totals['duration'] / 3600
+    console.print(f"[blue]Videos: {len(processing_items)} ({hours:.1f}h of known duration, {unknown_duration} unknown)[/blue]")
+    if config.get('llm_tiers'):
+        tiers = ", ".join(f"{name}: {count}" for name, count in tier_counts.items())
+        console.print(f"[blue]LLM tiers: {tiers}, ~{totals['input_tokens']:,} input tokens[/blue]")
+    else:
+        console.print(f"[blue]LLM: {config.get('llm_provider')}/{config.get('llm_model')}, ~{totals['input_tokens']:,} input tokens[/blue]")
+    if args.no_subtitles:
+        console.print(f"[blue]Transcription ({config.get('transcription_provider')}): ~${totals['transcription_cost']:.2f}[/blue]")
+    else:
+        console.print("[blue]Transcription: subtitles preferred; audio is only transcribed when a video has none[/blue]")
+    if has_llm_pricing:
+        console.print(f"[blue]LLM cost: ~${totals['llm_cost']:.2f}[/blue]")
+    else:
+        console.print("[dim]Set llm_input_cost_per_million / llm_output_cost_per_million in config.yaml for LLM cost estimates[/dim]")
+
+def warm_heavy_imports(config: dict) -> None:
+    """Import the LLM and transcription stacks in the background; failures surface later where they're used"""
+    modules = ['tiktoken', 'litellm']
+    if config.get('transcription_provider', '').lower() == 'local':
+        modules.append('faster_whisper')
+    else:
+        modules.append('openai')
+    if config.get('embedding_index_dir'):
+        modules.append('fastembed')
+    for module in modules:
+        try:
+            __import__(module)
+        except Exception:
+            pass
+
+# Per-thread yt-dlp instance reused for every flat playlist/channel listing
+_listing_extractor = threading.local()
+
+def new_listing_extractor():
+    """Return a new flat-listing YoutubeDL instance"""
+    import yt_dlp
+
+    ydl_opts: dict[str, Any] = {
+        'extract_flat': True,  # Don't download videos, just get metadata
+        'quiet': True,
+        'no_warnings': True,
+    }
+    return yt_dlp.YoutubeDL(ydl_opts)  # type: ignore
+
+def get_listing_extractor(playlistend: Optional[int] = None):
+    """Return this thread's reusable flat-listing YoutubeDL instance"""
+    ydl = getattr(_listing_extractor, 'ydl', None)
+    if ydl is None:
+        ydl = new_listing_extractor()
+        _listing_extractor.ydl = ydl
+
+    # Listing limits differ per source, so set them on every call
+    ydl.params['playlistend'] = playlistend
+    return ydl
+
+def listing_videos(entries, limit: Optional[int] = None):
+    """
+    Yield flat listing entries as video dicts, skipping deleted/private videos
+    (None entries) and repeated IDs. `entries` may be a lazy yt-dlp page
+    generator; it is only advanced as far as the caller (and `limit`) needs.
+    """
+    seen_ids = set()
+    for entry in entries or []:
+        if limit is not None and len(seen_ids) >= limit:
+            return
+        if entry is None:
+            continue
+        video_id = entry.get('id')
+        if not video_id or video_id in seen_ids:
+            continue
+        seen_ids.add(video_id)
+        yield {
+            'video_id': video_id,
+            'video_url': f"https://www.youtube.com/watch?v={video_id}",
+            'video_title': entry.get('title', 'Unknown Title'),
+            'duration': entry.get('duration'),
+            'timestamp': entry.get('timestamp') or entry.get('release_timestamp')
+        }
+
+def _listing_cache_path(config: dict, kind: str, url: str, limit: Optional[str] = None) -> str:
+    import hashlib, os
+    cache_dir = config.get('listing_cache_dir', '.listing_cache')
+    key = hashlib.sha1(f"{kind}|{url}|{limit}".encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f"{kind}_{key}.json")
+
+def load_cached_listing(config: dict, kind: str, url: str, limit: Optional[str] = None) -> Optional[dict]:
+    """Return a cached flat listing if one exists and is younger than listing_cache_ttl"""
+    import json, os
+    ttl = config.get('listing_cache_ttl', 3600)
+    if not ttl or ttl <= 0:
+        return None
+
+    cache_path = _listing_cache_path(config, kind, url, limit)
+    listing = None
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if time.time() - cached.get('cached_at', 0) <= ttl:
+                listing = cached['listing']
+        except (OSError, ValueError, KeyError):
+            listing = None
+
+    pipeline_metrics.cache_event('listing', listing is not None)
+    return listing
+
+def save_cached_listing(config: dict, kind: str, url: str, listing: dict, limit: Optional[str] = None) -> None:
+    """Write a flat listing to the on-disk listing cache (no-op when caching is disabled)"""
+    import json, os
+    ttl = config.get('listing_cache_ttl', 3600)
+    if not ttl or ttl <= 0:
+        return
+
+    cache_path = _listing_cache_path(config, kind, url, limit)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'cached_at': time.time(), 'listing': listing}, f)
+    os.replace(tmp_path, cache_path)
+
+def result_source(target: dict) -> str:
+    """Source key of a queued item or mirror: 'playlist:<id>', 'channel:<id>' or 'direct'"""
+    if target['playlist_id']:
+        return f"playlist:{target['playlist_id']}"
+    elif target['channel_id']:
+        return f"channel:{target['channel_id']}"
+    return 'direct'
+
+def _by_duration(items: list) -> list:
+    """Shortest first; videos of unknown length are placed as if they had the median known length"""
+    known = sorted(item['duration'] for item in items if item.get('duration'))
+    typical = known[len(known) // 2] if known else 0
+    return sorted(items, key=lambda item: item.get('duration') or typical)
+
+def _by_newest(items: list) -> list:
+    """Most recently published first; items without a timestamp keep their listing order after them"""
+    return sorted(items, key=lambda item: -(item.get('timestamp') or float('-inf')))
+
+def _by_fair_share(items: list) -> list:
+    """Round-robin across sources (shortest first within each), so no channel or playlist starves the others"""
+    queues: dict[str, list] = {}
+    for item in items:
+        queues.setdefault(result_source(item), []).append(item)
+    queues = {source: _by_duration(source_items) for source, source_items in queues.items()}
+    ordered = []
+    for round_index in range(max((len(q) for q in queues.values()), default=0)):
+        ordered.extend(q[round_index] for q in queues.values() if round_index < len(q))
+    return ordered
+
+def schedule_priorities(config: dict) -> dict:
+    """schedule_priorities with every value as a float (YAML may give "10"); raises ValueError for non-numbers"""
+    priorities = config.get('schedule_priorities') or {}
+    if not isinstance(priorities, dict):
+        raise ValueError("schedule_priorities must map video IDs or sources to numbers")
+    coerced = {}
+    for key, value in priorities.items():
+        try:
+            if isinstance(value, bool):
+                raise TypeError
+            coerced[key] = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"schedule_priorities['{key}'] must be a number, got {value!r}") from None
+    return coerced
+
+def _by_priority(items: list, priorities: dict) -> list:
+    """Highest schedule_priorities value first (video id, then source key, else 0), shortest first within a level"""
+    def priority(item: dict) -> float:
+        if item['video_id'] in priorities:
+            return priorities[item['video_id']]
+        return priorities.get(result_source(item), 0)
+    return sorted(_by_duration(items), key=lambda item: -priority(item))
+
+SCHEDULING_POLICIES = {
+    'fifo': lambda items, config: list(items),
+    'shortest': lambda items, config: _by_duration(items),
+    'newest': lambda items, config: _by_newest(items),
+    'fair': lambda items, config: _by_fair_share(items),
+    'priority': lambda items, config: _by_priority(items, schedule_priorities(config)),
+}
+
+def schedule_items(processing_items: list, policy: str, config: dict) -> list:
+    """
+    Order the processing queue with one of SCHEDULING_POLICIES.
+
+    Processing in input order lets one long livestream at the head of a channel
+    delay every short video behind it; shortest-first minimises the mean time
+    to each summary, and fair share bounds how long any one source waits.
+    """
+    if policy not in SCHEDULING_POLICIES:
+        raise ValueError(f"Unknown schedule policy '{policy}' (choose from {', '.join(SCHEDULING_POLICIES)})")
+    return SCHEDULING_POLICIES[policy](processing_items, config)
+
+class StreamScheduler:
+    """
+    Hand out items in schedule order while they are still being listed.
+
+    A background thread drains `items` (a lazy generator over paged channel
+    listings) into a buffer. The first item is handed out once `window` items
+    (about one listing page) are buffered or the listing has ended, and each
+    time the next item is taken the buffer is re-ordered with the policy if
+    anything new came in, so shortest-first and friends apply to every video
+    listed so far rather than to the whole (unknown) listing. The thread stops
+    reading the listing while `max_buffered` items are waiting, which bounds
+    memory for huge channels. An error raised by the listing reaches the
+    consumer once the buffer is empty.
+    """
+
+    def __init__(self, items, policy: str, config: dict):
+        if policy not in SCHEDULING_POLICIES:
+            raise ValueError(f"Unknown schedule policy '{policy}' (choose from {', '.join(SCHEDULING_POLICIES)})")
+        self.policy = policy
+        self.config = config
+        self.window = max(1, int(config.get('schedule_window', 30)))
+        self.max_buffered = max(self.window, int(config.get('schedule_max_buffered', 200)))
+        self.started = False
+        self.buffer = []
+        self.dirty = False
+        self.done = False
+        self.error = None
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self._fill, args=(items,), daemon=True)
+        self.thread.start()
+
+    def _fill(self, items) -> None:
+        try:
+            for item in items:
+                with self.cond:
+                    while len(self.buffer) >= self.max_buffered:
+                        self.cond.wait()
+                    self.buffer.append(item)
+                    self.dirty = True
+                    self.cond.notify_all()
+        except BaseException as e:
+            self.error = e
+        finally:
+            with self.cond:
+                self.done = True
+                self.cond.notify_all()
+
+    @property
+    def pending(self) -> int:
+        """Items listed but not handed out yet"""
+        return len(self.buffer)
+
+    def __iter__(self):
+        while True:
+            with self.cond:
+                # Order the first page as a whole, so e.g. a long video at the head of a listing doesn't go first
+                needed = 1 if self.started else self.window
+                while len(self.buffer) < needed and not self.done:
+                    self.cond.wait()
+                self.started = True
+                if not self.buffer:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                if self.dirty:
+                    self.buffer = schedule_items(self.buffer, self.policy, self.config)
+                    self.dirty = False
+                item = self.buffer.pop(0)
+                self.cond.notify_all()
+            yield item
+
+class WorkQueue:
+    """
+    SQLite work queue shared by distributed runs.
+
+    One run fills it with expanded processing items plus the playlist/channel
+    listings; any number of workers (on any host that can reach the file) then
+    claim videos under a time-limited lease, renew it while they work, and
+    report per-source results. A video whose lease expires (crashed worker) is
+    handed out again, up to max_attempts times, and then recorded as failed.
+    The rollback journal is used instead of WAL so the file can live on a
+    shared network filesystem.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS items (
+        video_id TEXT PRIMARY KEY,
+        position INTEGER,
+        item TEXT,
+        status TEXT NOT NULL DEFAULT 'pending',
+        worker TEXT,
+        lease_until REAL,
+        attempts INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS results (
+        video_id TEXT NOT NULL,
+        source TEXT NOT NULL,
+        result TEXT,
+        PRIMARY KEY (video_id, source)
+    );
+    CREATE TABLE IF NOT EXISTS sources (
+        kind TEXT NOT NULL,
+        source_id TEXT NOT NULL,
+        data TEXT,
+        PRIMARY KEY (kind, source_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_items_status ON items(status, position);
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 1800, max_attempts: int = 3):
+        import os
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.conn = self._connect()
+        self.conn.executescript(self.SCHEMA)
+
+    def _connect(self):
+        import sqlite3
+        # Autocommit mode; claims take the write lock explicitly with BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        return conn
+
+    def fill(self, processing_items: list, playlists: dict, channels: dict) -> int:
+        """
+        Queue items not already in the queue; returns how many were added.
+        A video already queued from another source gets the new sources as
+        mirrors, and a finished one is queued again just to link its results
+        into them (it is not processed a second time).
+        """
+        import json
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            start = self.conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM items").fetchone()[0]
+            added = 0
+            for item in processing_items:
+                row = self.conn.execute("SELECT item, status FROM items WHERE video_id = ?", (item['video_id'],)).fetchone()
+                if row is None:
+                    self.conn.execute("INSERT INTO items (video_id, position, item) VALUES (?, ?, ?)",
+                                      (item['video_id'], start + added, json.dumps(item)))
+                    added += 1
+                    continue
+                stored, status = json.loads(row[0]), row[1]
+                known_dirs = {stored['output_dir']} | {m['output_dir'] for m in stored['mirrors']}
+                new_mirrors = [{key: source[key] for key in ('source_type', 'playlist_id', 'channel_id', 'output_dir')}
+                               for source in [item] + item['mirrors'] if source['output_dir'] not in known_dirs]
+                if not new_mirrors:
+                    continue
+                stored['mirrors'] += new_mirrors
+                if status in ('done', 'failed'):
+                    self._queue_links(item['video_id'], stored, status)
+                else:
+                    # A worker holding the lease only knows the old sources; complete() queues the rest for linking
+                    self.conn.execute("UPDATE items SET item = ? WHERE video_id = ?", (json.dumps(stored), item['video_id']))
+            rows = [('playlist', key, json.dumps(data)) for key, data in playlists.items()]
+            rows += [('channel', key, json.dumps(data)) for key, data in channels.items()]
+            self.conn.executemany("INSERT OR REPLACE INTO sources (kind, source_id, data) VALUES (?, ?, ?)", rows)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def claim(self, worker_id: str) -> Optional[dict]:
+        """Lease the next pending (or abandoned) video to this worker"""
+        import json
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._fail_abandoned(now)
+            row = self.conn.execute(
+                "SELECT video_id, item FROM items "
+                "WHERE (status = 'pending' OR (status = 'leased' AND lease_until < ?)) AND attempts < ? "
+                "ORDER BY position LIMIT 1",
+                (now, self.max_attempts),
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE items SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1 WHERE video_id = ?",
+                    (worker_id, now + self.lease_seconds, row[0]),
+                )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return json.loads(row[1]) if row else None
+
+    def _fail_abandoned(self, now: float) -> None:
+        """Mark videos whose last allowed lease expired as failed, with a result row per source"""
+        import json
+        abandoned = self.conn.execute(
+            "SELECT video_id, item, attempts FROM items WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+            (now, self.max_attempts),
+        ).fetchall()
+        for video_id, item_json, attempts in abandoned:
+            item = json.loads(item_json)
+            rows = []
+            for target in [item] + item.get('mirrors', []):
+                rows.append({
+                    'video_id': video_id,
+                    'video_title': item.get('video_title'),
+                    'status': 'failed',
+                    'error': f"Lease expired after {attempts} attempts",
+                    'output_file': None,
+                    'source': result_source(target),
+                    'mirrored': target is not item
+                })
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO results (video_id, source, result) VALUES (?, ?, ?)",
+                [(video_id, r['source'], json.dumps(r)) for r in rows],
+            )
+            self.conn.execute("UPDATE items SET status = 'failed', lease_until = NULL WHERE video_id = ?", (video_id,))
+
+    def claims(self, worker_id: str, on_drained=None):
+        """
+        Yield claimed items until the queue is drained, renewing this worker's
+        leases in the background (all of them, since videos waiting for a packed
+        summary stay leased while the next ones are claimed). on_drained, if
+        given, runs once the queue is empty but while the leases are still
+        being renewed, to finish videos that are still held.
+        """
+        stop = threading.Event()
+
+        def _heartbeat():
+            import sqlite3
+            conn = self._connect()
+            interval = self.lease_seconds / 3
+            while not stop.wait(interval):
+                try:
+                    conn.execute(
+                        "UPDATE items SET lease_until = ? WHERE worker = ? AND status = 'leased'",
+                        (time.time() + self.lease_seconds, worker_id),
+                    )
+                    interval = self.lease_seconds / 3
+                except sqlite3.OperationalError:
+                    # e.g. 'database is locked' on a busy share: retry soon instead of letting the leases lapse
+                    interval = min(5.0, self.lease_seconds / 30)
+            conn.close()
+
+        threading.Thread(target=_heartbeat, daemon=True).start()
+        try:
+            while True:
+                item = self.claim(worker_id)
+                if item is None:
+                    if on_drained is not None:
+                        on_drained()
+                    return
+                yield item
+        finally:
+            stop.set()
+
+    def _queue_links(self, video_id: str, item: dict, status: str) -> None:
+        """
+        Finish a video as done/failed, or, if some of its sources have no result
+        yet (added by a later fill), hand it out again with 'late_mirrors' and
+        the recorded 'outcome' so a worker only links the results into them
+        """
+        import json, os
+        item.pop('late_mirrors', None)
+        item.pop('outcome', None)
+        results = {source: json.loads(result) for source, result in self.conn.execute(
+            "SELECT source, result FROM results WHERE video_id = ?", (video_id,))}
+        late = [m for m in item['mirrors'] if result_source(m) not in results]
+        primary = results.get(result_source(item))
+        if late and primary is not None:
+            output_file = primary.get('output_file')
+            item['late_mirrors'] = late
+            item['outcome'] = [primary['status'], primary.get('error'), os.path.basename(output_file) if output_file else None]
+            self.conn.execute(
+                "UPDATE items SET item = ?, status = 'pending', worker = NULL, lease_until = NULL, attempts = 0 WHERE video_id = ?",
+                (json.dumps(item), video_id),
+            )
+        else:
+            self.conn.execute("UPDATE items SET item = ?, status = ?, lease_until = NULL WHERE video_id = ?",
+                              (json.dumps(item), status, video_id))
+
+    def complete(self, video_id: str, worker_id: str, status: str, results: list) -> bool:
+        """
+        Store a video's per-source result rows and mark it done or failed.
+        Returns False (storing nothing) if this worker no longer holds the lease.
+        """
+        import json
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT item FROM items WHERE video_id = ? AND worker = ? AND status = 'leased'",
+                (video_id, worker_id),
+            ).fetchone()
+            if row is None:
+                self.conn.execute("ROLLBACK")
+                return False
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO results (video_id, source, result) VALUES (?, ?, ?)",
+                [(video_id, r['source'], json.dumps(r)) for r in results],
+            )
+            self._queue_links(video_id, json.loads(row[0]), 'done' if status == 'success' else 'failed')
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def counts(self) -> dict:
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM items GROUP BY status").fetchall())
+
+    def remaining(self) -> int:
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM items WHERE status IN ('pending', 'leased') AND attempts < ?",
+            (self.max_attempts,),
+        ).fetchone()[0]
+
+    def sources(self) -> tuple:
+        """(playlists, channels) listings as stored by fill()"""
+        import json
+        playlists, channels = {}, {}
+        for kind, source_id, data in self.conn.execute("SELECT kind, source_id, data FROM sources"):
+            (playlists if kind == 'playlist' else channels)[source_id] = json.loads(data)
+        return playlists, channels
+
+    def results(self) -> list:
+        import json
+        return [json.loads(row[0]) for row in self.conn.execute(
+            "SELECT r.result FROM results r JOIN items i ON i.video_id = r.video_id ORDER BY i.position")]
+
+    def close(self) -> None:
+        self.conn.close()
 
 def main(args):
-    import os, json, glob, time, re
+    import os, json, time, re
     try:
         from rich.console import Console
     except Exception:
@@ -1112,141 +4130,125 @@ def main(args):
         else:
             return ('video', url)
 
-    def expand_playlist(playlist_url: str, console) -> dict:
+    def expand_playlist(playlist_url: str, config: dict, console) -> dict:
         """
         Expand playlist URL using yt-dlp.
         Returns dict with playlist_id, title, uploader, playlist_count, videos list
         """
-        import yt_dlp
+        cached = load_cached_listing(config, 'playlist', playlist_url)
+        if cached is not None:
+            console.print(f"[green]Playlist: {cached['title']} ({cached['playlist_count']} videos, cached listing)[/green]")
+            return cached
 
         console.print(f"[yellow]Extracting playlist information...[/yellow]")
 
-        ydl_opts: dict[str, Any] = {
-            'extract_flat': True,  # Don't download videos, just get metadata
-            'quiet': True,
-            'no_warnings': True,
-        }
-
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:  # type: ignore
-            playlist_info = ydl.extract_info(playlist_url, download=False)
+        ydl = get_listing_extractor()
+        playlist_info = ydl.extract_info(playlist_url, download=False)
 
-            playlist_id = playlist_info.get('id', 'unknown')
-            title = playlist_info.get('title', 'Untitled Playlist')
-            uploader = playlist_info.get('uploader', 'Unknown')
-            entries = playlist_info.get('entries', [])
-
-            # Filter None entries (deleted/private videos)
-            videos = []
-            for entry in entries:
-                if entry is None:
-                    continue
-                video_id = entry.get('id')
-                if not video_id:
-                    continue
-                videos.append({
-                    'video_id': video_id,
-                    'video_url': f"https://www.youtube.com/watch?v={video_id}",
-                    'video_title': entry.get('title', 'Unknown Title')
-                })
+        playlist_id = playlist_info.get('id', 'unknown')
+        title = playlist_info.get('title', 'Untitled Playlist')
+        uploader = playlist_info.get('uploader', 'Unknown')
+        videos = list(listing_videos(playlist_info.get('entries', [])))
 
-            console.print(f"[green]Playlist: {title} ({len(videos)} videos)[/green]")
+        console.print(f"[green]Playlist: {title} ({len(videos)} videos)[/green]")
 
-            return {
-                'playlist_id': playlist_id,
-                'title': title,
-                'uploader': uploader,
-                'playlist_count': len(videos),
-                'videos': videos
-            }
+        playlist_data = {
+            'playlist_id': playlist_id,
+            'title': title,
+            'uploader': uploader,
+            'playlist_count': len(videos),
+            'videos': videos
+        }
+        save_cached_listing(config, 'playlist', playlist_url, playlist_data)
+        return playlist_data
 
-    def expand_channel(channel_url: str, channel_limit: str, console) -> dict:
+    def expand_channel(channel_url: str, channel_limit: str, config: dict, console) -> tuple:
         """
         Expand channel URL using yt-dlp.
-        Returns dict with channel_id, channel_name, description, total_count, videos list
+        Returns (channel_data, videos): channel_data holds channel_id, channel_name,
+        description, total_count and the videos list; `videos` iterates the uploads.
+
+        Uploads are listed lazily, one page at a time as `videos` is consumed, so
+        processing can start before a large channel has been listed completely.
+        channel_data['videos'] grows as they arrive, total_count is set once the
+        listing ends, and the listing is cached only when it was read to the end.
 
         Args:
             channel_url: YouTube channel URL (normalized to include /videos)
             channel_limit: String from argparse choices ("10", "25", "50", "100", "all")
+            config: Loaded configuration (listing cache settings)
             console: Rich console for output
         """
-        import yt_dlp
+        cached = load_cached_listing(config, 'channel', channel_url, channel_limit)
+        if cached is not None:
+            console.print(f"[green]Channel: {cached['channel_name']} ({cached['total_count']} videos to process, cached listing)[/green]")
+            return cached, iter(cached['videos'])
 
         console.print(f"[yellow]Extracting channel information...[/yellow]")
 
         # Convert limit string to integer or None for "all"
         if channel_limit == "all":
-            max_videos = None  # yt-dlp will fetch all videos
-            console.print("[blue]Fetching ALL videos from channel (this may take a while)...[/blue]")
+            max_videos = None
+            console.print("[blue]Listing ALL videos from channel (processing starts with the first page)...[/blue]")
         else:
             max_videos = int(channel_limit)
             console.print(f"[blue]Fetching up to {max_videos} videos from channel...[/blue]")
 
-        ydl_opts: dict[str, Any] = {
-            'extract_flat': True,  # Don't download videos, just get metadata
-            'quiet': True,
-            'no_warnings': True,
+        # process=False leaves 'entries' as yt-dlp's lazy page generator; the listing is consumed
+        # from another thread later, so it gets its own extractor instead of this thread's shared one
+        ydl = new_listing_extractor()
+        channel_info = ydl.extract_info(channel_url, download=False, process=False)
+
+        # Extract channel metadata
+        channel_id = channel_info.get('channel_id', channel_info.get('id', 'unknown'))
+        channel_name = channel_info.get('channel', channel_info.get('uploader', 'Unknown Channel'))
+        description = channel_info.get('description', 'No description available')
+
+        # Extract username from channel_name or URL
+        username = channel_name
+        if '@' in channel_url:
+            # Extract @username from URL
+            match = re.search(r'@([^/]+)', channel_url)
+            if match:
+                username = f"@{match.group(1)}"
+
+        console.print(f"[green]Channel: {channel_name} (listing uploads)[/green]")
+
+        channel_data = {
+            'channel_id': channel_id,
+            'channel_name': channel_name,
+            'username': username,  # Used for directory naming
+            'description': description,
+            'total_count': 0,
+            'videos': []
         }
 
-        # Add playlistend option if limit is specified
-        if max_videos is not None:
-            ydl_opts['playlistend'] = max_videos
-
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:  # type: ignore
-            channel_info = ydl.extract_info(channel_url, download=False)
+        def stream_videos():
+            try:
+                for video in listing_videos(channel_info.get('entries'), max_videos):
+                    channel_data['videos'].append(video)
+                    yield video
+            finally:
+                channel_data['total_count'] = len(channel_data['videos'])
+            console.print(f"[green]Channel: {channel_name} ({channel_data['total_count']} videos to process)[/green]")
+            save_cached_listing(config, 'channel', channel_url, channel_data, channel_limit)
 
-            # Extract channel metadata
-            channel_id = channel_info.get('channel_id', channel_info.get('id', 'unknown'))
-            channel_name = channel_info.get('channel', channel_info.get('uploader', 'Unknown Channel'))
-            description = channel_info.get('description', 'No description available')
-            entries = channel_info.get('entries', [])
+        return channel_data, stream_videos()
 
-            # Filter None entries (deleted/private videos)
-            videos = []
-            for entry in entries:
-                if entry is None:
-                    continue
-                video_id = entry.get('id')
-                if not video_id:
-                    continue
-                videos.append({
-                    'video_id': video_id,
-                    'video_url': f"https://www.youtube.com/watch?v={video_id}",
-                    'video_title': entry.get('title', 'Unknown Title')
-                })
-
-            # Extract username from channel_name or URL
-            username = channel_name
-            if '@' in channel_url:
-                # Extract @username from URL
-                import re
-                match = re.search(r'@([^/]+)', channel_url)
-                if match:
-                    username = f"@{match.group(1)}"
-
-            console.print(f"[green]Channel: {channel_name} ({len(videos)} videos to process)[/green]")
-
-            return {
-                'channel_id': channel_id,
-                'channel_name': channel_name,
-                'username': username,  # Used for directory naming
-                'description': description,
-                'total_count': len(videos),
-                'videos': videos
-            }
-
-    def create_playlist_metadata(playlist_id: str, playlist_data: dict, results: list, console) -> None:
+    def create_playlist_metadata(playlist_id: str, playlist_data: dict, results: ResultIndex, console, analytics: Optional[dict] = None) -> None:
         """
         Create PLAYLIST_{playlist_id}_INFO.md with playlist details and video links.
+        The video list is written line by line, so long playlists are never built up as one string.
         """
         output_dir = f"PLAYLIST_{playlist_id}"
         metadata_file = f"{output_dir}/PLAYLIST_{playlist_id}_INFO.md"
 
-        # Filter results for this playlist
-        playlist_results = [r for r in results if r['source'] == f"playlist:{playlist_id}"]
-        success_count = sum(1 for r in playlist_results if r['status'] == 'success')
-        failed_count = sum(1 for r in playlist_results if r['status'] == 'failed')
+        source = f"playlist:{playlist_id}"
+        counts = results.counts(source)
+        success_count = counts.get('success', 0)
+        failed_count = counts.get('failed', 0)
 
-        content = f"""# Playlist: {playlist_data['title']}
+        header = f"""# Playlist: {playlist_data['title']}
 
 **Uploader**: {playlist_data['uploader']}
 **Total Videos**: {playlist_data['playlist_count']}
@@ -1257,42 +4259,46 @@ def main(args):
 
 """
 
-        for video in playlist_data['videos']:
-            video_id = video['video_id']
-            video_title = video['video_title']
-            result = next((r for r in playlist_results if r['video_id'] == video_id), None)
-
-            if result and result['status'] == 'success':
-                status_emoji = ""
-                link = f"[View Summary](SUMMARY_{video_id}.md)"
-            elif result and result['status'] == 'failed':
-                status_emoji = "❌ "
-                link = f"Failed: {result['error']}"
-            else:
-                status_emoji = "⏭️ "
-                link = "Skipped"
+        with open(metadata_file, 'w', encoding='utf-8') as f:
+            f.write(header)
+            for video in playlist_data['videos']:
+                video_id = video['video_id']
+                video_title = video['video_title']
+                result = results.get(video_id, source)
+
+                if result and result['status'] == 'success':
+                    status_emoji = ""
+                    link = f"[View Summary](SUMMARY_{video_id}.md)" if result['output_file'] else "Comments analyzed"
+                elif result and result['status'] == 'failed':
+                    status_emoji = "❌ "
+                    link = f"Failed: {result['error']}"
+                else:
+                    status_emoji = "⏭️ "
+                    link = "Skipped"
 
-            content += f"- {status_emoji}**{video_title}** ({video_id}) - {link}\n"
+                f.write(f"- {status_emoji}**{video_title}** ({video_id}) - {link}\n")
 
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            f.write(content)
+            if analytics:
+                titles = {v['video_id']: (results.get(v['video_id'], source) or v)['video_title'] for v in playlist_data['videos']}
+                f.write("\n" + format_comment_analytics(analytics, titles))
 
         console.print(f"[green]Playlist metadata saved to {metadata_file}[/green]")
 
-    def create_channel_metadata(channel_id: str, channel_data: dict, results: list, console) -> None:
+    def create_channel_metadata(channel_id: str, channel_data: dict, results: ResultIndex, console, analytics: Optional[dict] = None) -> None:
         """
         Create CHANNEL_{username}_INFO.md with channel details and video links.
+        The video list is written line by line, so channels with thousands of uploads are never built up as one string.
         """
         username = channel_data['username']
         output_dir = f"CHANNEL_{username}"
         metadata_file = f"{output_dir}/CHANNEL_{username}_INFO.md"
 
-        # Filter results for this channel
-        channel_results = [r for r in results if r['source'] == f"channel:{channel_id}"]
-        success_count = sum(1 for r in channel_results if r['status'] == 'success')
-        failed_count = sum(1 for r in channel_results if r['status'] == 'failed')
+        source = f"channel:{channel_id}"
+        counts = results.counts(source)
+        success_count = counts.get('success', 0)
+        failed_count = counts.get('failed', 0)
 
-        content = f"""# Channel: {channel_data['channel_name']}
+        header = f"""# Channel: {channel_data['channel_name']}
 
 **Username**: {username}
 **Channel ID**: {channel_id}
@@ -1308,25 +4314,28 @@ def main(args):
 
 """
 
-        for video in channel_data['videos']:
-            video_id = video['video_id']
-            video_title = video['video_title']
-            result = next((r for r in channel_results if r['video_id'] == video_id), None)
-
-            if result and result['status'] == 'success':
-                status_emoji = "✅"
-                link = f"[View Summary](SUMMARY_{video_id}.md)"
-            elif result and result['status'] == 'failed':
-                status_emoji = "❌"
-                link = f"Failed: {result['error']}"
-            else:
-                status_emoji = "⏭️"
-                link = "Skipped"
+        with open(metadata_file, 'w', encoding='utf-8') as f:
+            f.write(header)
+            for video in channel_data['videos']:
+                video_id = video['video_id']
+                video_title = video['video_title']
+                result = results.get(video_id, source)
+
+                if result and result['status'] == 'success':
+                    status_emoji = "✅"
+                    link = f"[View Summary](SUMMARY_{video_id}.md)" if result['output_file'] else "Comments analyzed"
+                elif result and result['status'] == 'failed':
+                    status_emoji = "❌"
+                    link = f"Failed: {result['error']}"
+                else:
+                    status_emoji = "⏭️"
+                    link = "Skipped"
 
-            content += f"- {status_emoji} **{video_title}** ({video_id}) - {link}\n"
+                f.write(f"- {status_emoji} **{video_title}** ({video_id}) - {link}\n")
 
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            f.write(content)
+            if analytics:
+                titles = {v['video_id']: (results.get(v['video_id'], source) or v)['video_title'] for v in channel_data['videos']}
+                f.write("\n" + format_comment_analytics(analytics, titles))
 
         console.print(f"[green]Channel metadata saved to {metadata_file}[/green]")
 
@@ -1335,8 +4344,9 @@ def main(args):
         if not results:
             return
 
-        success = [r for r in results if r['status'] == 'success']
-        failed = [r for r in results if r['status'] == 'failed']
+        # Videos shared by several sources are reported once
+        success = [r for r in results if r['status'] == 'success' and not r.get('mirrored')]
+        failed = [r for r in results if r['status'] == 'failed' and not r.get('mirrored')]
 
         console.rule("[bold blue]Processing Summary")
         console.print(f"[green]Successful: {len(success)}[/green]")
@@ -1353,10 +4363,31 @@ def main(args):
     # Start timing the entire script execution
     script_start_time = time.time()
 
-    config = load_config()
+    plan_only = getattr(args, 'plan', False)
+    queue_path = getattr(args, 'queue', None)
+    worker = getattr(args, 'worker', False)
+    aggregate = getattr(args, 'aggregate', False)
+    fill_queue = bool(queue_path) and not worker and not aggregate
+    if (worker or aggregate) and not queue_path:
+        console.print("[red]--worker and --aggregate need --queue PATH[/red]")
+        return
+    if not (worker or aggregate) and not args.input:
+        console.print("[red]An input file or YouTube URL is required[/red]")
+        return
+
+    # Planning, queue filling and aggregation never call providers, so missing API keys shouldn't block them
+    config = load_config(validate=not (plan_only or fill_queue or aggregate))
+    pipeline_metrics.configure(getattr(args, 'metrics_file', None))
+    pipeline_metrics.profiler = None
+    if getattr(args, 'profile', None):
+        pipeline_metrics.profiler = StageProfiler(getattr(args, 'profile_dir', None) or 'profiles', args.profiler)
+        console.print(f"[blue]Profiling pipeline stages with {pipeline_metrics.profiler.backend}[/blue]")
 
     # Determine if input is a file or a direct YouTube URL/identifier
-    if is_youtube_url(args.input):
+    if worker or aggregate:
+        # Work comes from the shared queue instead
+        urls = []
+    elif is_youtube_url(args.input):
         # YouTube URL/identifier provided
         urls = [args.input]
         console.print(f"[blue]Processing YouTube input: {args.input}[/blue]")
@@ -1379,162 +4410,592 @@ def main(args):
         
         console.print(f"[blue]Processing {len(urls)} URLs from file: {args.input}[/blue]")
 
-    # Expand playlists and build processing queue
-    processing_items = []
-    playlists = {}  # Track playlist metadata
-    channels = {}   # Track channel metadata
-    results = []    # Track success/failure
-
+    # Classify inputs and collapse repeated lines so each source is expanded once
+    sources = []
+    seen_sources = set()
     for url in urls:
         url_type, url_clean = classify_url(url)
+        source_key = (url_type, extract_video_id(url) or url) if url_type == 'video' else (url_type, url_clean)
+        if source_key in seen_sources:
+            console.print(f"[dim]Skipping duplicate input: {url}[/dim]")
+            continue
+        seen_sources.add(source_key)
+        sources.append((url, url_type, url_clean))
 
+    def expand_source(url: str, url_type: str, url_clean: str) -> dict:
         if url_type == 'playlist':
-            try:
-                playlist_data = expand_playlist(url, console)
+            return expand_playlist(url, config, console)
+        return expand_channel(url_clean, args.channel_limit, config, console)
+
+    # Expand playlists and channels concurrently; results are consumed in input order below
+    remote_sources = [source for source in sources if source[1] in ('playlist', 'channel')]
+    expansions = {}
+    if remote_sources:
+        from concurrent.futures import ThreadPoolExecutor
+
+        expansion_workers = max(1, min(int(config.get('expansion_workers', 4)), len(remote_sources)))
+        if expansion_workers > 1:
+            console.print(f"[blue]Expanding {len(remote_sources)} playlists/channels with {expansion_workers} workers...[/blue]")
+        with ThreadPoolExecutor(max_workers=expansion_workers) as executor:
+            futures = {source: executor.submit(expand_source, *source) for source in remote_sources}
+            for source, future in futures.items():
+                try:
+                    expansions[source] = future.result()
+                except Exception as e:
+                    expansions[source] = e
+
+    # Build processing queue
+    playlists = {}  # Track playlist metadata
+    channels = {}   # Track channel metadata
+    results = ResultIndex()  # Track success/failure per video and source
+    queued = {}     # video_id -> queued item, so each video is processed once
+
+    def enqueue(item: dict) -> bool:
+        """Register a listed video; returns False when it is already queued from another source"""
+        existing = queued.get(item['video_id'])
+        if existing is None:
+            item['mirrors'] = []
+            queued[item['video_id']] = item
+            return True
+
+        # Same video from another source: process once, then link results into this source too
+        known_dirs = [existing['output_dir']] + [m['output_dir'] for m in existing['mirrors']]
+        if item['output_dir'] in known_dirs:
+            return False
+        existing['mirrors'].append({
+            'source_type': item['source_type'],
+            'playlist_id': item['playlist_id'],
+            'channel_id': item['channel_id'],
+            'output_dir': item['output_dir'],
+        })
+        return False
+
+    def queue_items():
+        """Yield new processing items in input order, consuming channel listings page by page"""
+        for source in sources:
+            url, url_type, url_clean = source
+
+            if url_type == 'playlist':
+                playlist_data = expansions[source]
+                if isinstance(playlist_data, Exception):
+                    console.print(f"[red]Skipping playlist: {playlist_data}[/red]")
+                    continue
+
                 playlist_id = playlist_data['playlist_id']
+                if playlist_id in playlists:
+                    console.print(f"[dim]Playlist {playlist_id} already queued from another input[/dim]")
+                    continue
                 playlists[playlist_id] = playlist_data
 
                 # Create playlist directory
                 playlist_dir = f"PLAYLIST_{playlist_id}"
-                os.makedirs(playlist_dir, exist_ok=True)
-                console.print(f"[blue]Created directory: {playlist_dir}[/blue]")
+                if not plan_only:
+                    os.makedirs(playlist_dir, exist_ok=True)
+                    console.print(f"[blue]Created directory: {playlist_dir}[/blue]")
 
                 # Add all videos from playlist
                 for video in playlist_data['videos']:
-                    processing_items.append({
+                    item = {
                         'video_url': video['video_url'],
                         'video_id': video['video_id'],
                         'video_title': video['video_title'],
+                        'duration': video.get('duration'),
+                        'timestamp': video.get('timestamp'),
                         'source_type': 'playlist',
                         'playlist_id': playlist_id,
                         'channel_id': None,
                         'output_dir': playlist_dir,
-                    })
-            except Exception as e:
-                console.print(f"[red]Skipping playlist: {e}[/red]")
-                continue
+                    }
+                    if enqueue(item):
+                        yield item
+
+            elif url_type == 'channel':
+                expansion = expansions[source]
+                if isinstance(expansion, Exception):
+                    console.print(f"[red]Skipping channel: {expansion}[/red]")
+                    continue
+                channel_data, channel_videos = expansion
 
-        elif url_type == 'channel':
-            try:
-                channel_data = expand_channel(url_clean, args.channel_limit, console)
                 channel_id = channel_data['channel_id']
+                if channel_id in channels:
+                    console.print(f"[dim]Channel {channel_id} already queued from another input[/dim]")
+                    continue
                 username = channel_data['username']
                 channels[channel_id] = channel_data
 
                 # Create channel directory
                 channel_dir = f"CHANNEL_{username}"
-                os.makedirs(channel_dir, exist_ok=True)
-                console.print(f"[blue]Created directory: {channel_dir}[/blue]")
+                if not plan_only:
+                    os.makedirs(channel_dir, exist_ok=True)
+                    console.print(f"[blue]Created directory: {channel_dir}[/blue]")
 
-                # Add all videos from channel
-                for video in channel_data['videos']:
-                    processing_items.append({
-                        'video_url': video['video_url'],
-                        'video_id': video['video_id'],
-                        'video_title': video['video_title'],
-                        'source_type': 'channel',
-                        'playlist_id': None,
-                        'channel_id': channel_id,
-                        'output_dir': channel_dir,
-                    })
-            except Exception as e:
-                console.print(f"[red]Skipping channel: {e}[/red]")
-                continue
+                # Add videos from the channel as its listing pages arrive
+                try:
+                    for video in channel_videos:
+                        item = {
+                            'video_url': video['video_url'],
+                            'video_id': video['video_id'],
+                            'video_title': video['video_title'],
+                            'duration': video.get('duration'),
+                            'timestamp': video.get('timestamp'),
+                            'source_type': 'channel',
+                            'playlist_id': None,
+                            'channel_id': channel_id,
+                            'output_dir': channel_dir,
+                        }
+                        if enqueue(item):
+                            yield item
+                except Exception as e:
+                    console.print(f"[red]Channel listing for {username} stopped after {len(channel_data['videos'])} videos: {e}[/red]")
 
-        else:
-            # Single video
-            video_id = extract_video_id(url)
-            if not video_id:
-                console.print(f"[red]Could not extract video ID: {url}[/red]")
-                continue
+            else:
+                # Single video
+                video_id = extract_video_id(url)
+                if not video_id:
+                    console.print(f"[red]Could not extract video ID: {url}[/red]")
+                    continue
 
-            processing_items.append({
-                'video_url': url,
-                'video_id': video_id,
-                'video_title': 'Unknown',
-                'source_type': 'direct',
-                'playlist_id': None,
-                'channel_id': None,
-                'output_dir': '.',
+                item = {
+                    'video_url': url,
+                    'video_id': video_id,
+                    'video_title': 'Unknown',
+                    'duration': None,
+                    'timestamp': None,
+                    'source_type': 'direct',
+                    'playlist_id': None,
+                    'channel_id': None,
+                    'output_dir': '.',
+                }
+                if enqueue(item):
+                    yield item
+
+        if urls:
+            console.print(f"[bold blue]Total videos to process: {len(queued)} (order: {schedule_policy})[/bold blue]")
+
+    schedule_policy = getattr(args, 'schedule', None) or config.get('schedule_policy', 'shortest')
+
+    if plan_only or fill_queue:
+        # Both need the whole listing up front
+        processing_items = schedule_items(list(queue_items()), schedule_policy, config)
+        if plan_only:
+            print_work_plan(processing_items, config, args, console)
+            return
+
+    work_queue = None
+    if queue_path:
+        work_queue = WorkQueue(queue_path, config.get('queue_lease_seconds', 1800), config.get('queue_max_attempts', 3))
+        if fill_queue:
+            added = work_queue.fill(processing_items, playlists, channels)
+            console.print(f"[bold blue]Queued {added} new videos in {queue_path} ({work_queue.remaining()} waiting)[/bold blue]")
+            work_queue.close()
+            return
+        if aggregate:
+            playlists, channels = work_queue.sources()
+            results.add(work_queue.results())
+            for output_dir in [f"PLAYLIST_{pid}" for pid in playlists] + [f"CHANNEL_{c['username']}" for c in channels.values()]:
+                os.makedirs(output_dir, exist_ok=True)
+            console.print(f"[blue]Aggregating {len(results)} results from {queue_path}[/blue]")
+
+    # Hide litellm/faster-whisper import time behind the first download
+    if (urls or worker) and config.get('warm_imports', True):
+        threading.Thread(target=warm_heavy_imports, args=(config,), daemon=True).start()
+
+    exporter = None
+    if getattr(args, 'metrics_port', None) or getattr(args, 'metrics_textfile', None):
+        exporter = MetricsExporter(pipeline_metrics, results, config)
+        if args.metrics_port:
+            exporter.serve(args.metrics_port)
+            console.print(f"[blue]Serving Prometheus metrics on :{args.metrics_port}/metrics[/blue]")
+
+    # Downloaded media is shared across runs and output directories
+    media_cache_gb = config.get('media_cache_max_gb', 10)
+    media_cache.configure(config.get('media_cache_dir'), int(media_cache_gb * 1024**3) if media_cache_gb else None)
+
+    analyze_comments = getattr(args, 'analyze_comments', False)
+    comment_store_path = config.get('comment_store_path') or ('comments.sqlite' if analyze_comments else None)
+    comment_store = CommentStore(comment_store_path) if comment_store_path else None
+    search_index_path = None if analyze_comments else config.get('search_index_path')
+    search_index = SearchIndex(search_index_path, config.get('transcript_paragraph_seconds', 30),
+                               config.get('search_index_comments', 100)) if search_index_path else None
+
+    embedding_index = None
+    if config.get('embedding_index_dir') and not analyze_comments:
+        import importlib.util
+        try:
+            # The model itself loads lazily, so check for the package here rather than failing on every video
+            if importlib.util.find_spec('fastembed') is None:
+                raise ImportError("fastembed is required for the embedding index. Install with: pip install fastembed")
+            embedding_index = EmbeddingIndex(config['embedding_index_dir'], config.get('embedding_model'),
+                                             config.get('embedding_chunk_seconds', 60), config.get('embedding_batch_size', 64),
+                                             config.get('embedding_probe', 8))
+        except (ImportError, ValueError) as e:
+            console.print(f"[yellow]Embedding index disabled: {e}[/yellow]")
+
+    if analyze_comments:
+        console.print(f"[blue]Comment analysis mode: fetching metadata and comments only (store: {comment_store_path})[/blue]")
+
+    def record_results(item: dict, status: str, error: Optional[str] = None, summary_name: Optional[str] = None) -> None:
+        """Track the outcome for every source the video was queued from"""
+        # Sources listed after this point are picked up by the late-mirror pass below
+        targets = [item] + item['mirrors'][:item.setdefault('recorded_mirrors', len(item['mirrors']))]
+        item['outcome'] = (status, error, summary_name)
+        rows = []
+        for target in targets:
+            rows.append({
+                'video_id': item['video_id'],
+                'video_title': item['video_title'],
+                'status': status,
+                'error': error,
+                'output_file': f"{target['output_dir']}/{summary_name}" if summary_name else None,
+                'source': result_source(target),
+                'mirrored': target is not item
             })
+        results.add(rows)
+        if worker and not work_queue.complete(item['video_id'], worker_id, status, rows):
+            console.print(f"[yellow]Lease on {item['video_id']} was lost to another worker; its result was not recorded[/yellow]")
+
+    def link_late_mirrors(item: dict, late_mirrors: list) -> list:
+        """Link a finished video's results into sources listed after it was processed; returns their result rows"""
+        status, error, summary_name = item['outcome']
+        if summary_name:
+            mirror_artifacts(f"{item['output_dir']}/video_{item['video_id']}", f"{item['output_dir']}/{summary_name}",
+                             [m['output_dir'] for m in late_mirrors], console)
+        rows = [{
+            'video_id': item['video_id'],
+            'video_title': item['video_title'],
+            'status': status,
+            'error': error,
+            'output_file': f"{target['output_dir']}/{summary_name}" if summary_name else None,
+            'source': result_source(target),
+            'mirrored': True
+        } for target in late_mirrors]
+        results.add(rows)
+        return rows
+
+    def finish_video(job: dict, summary: str) -> None:
+        """Write a video's summary and finish it: cleanup, mirrors, search indexes and results"""
+        item = job['item']
+        video_id = item['video_id']
+        out_name = f"{item['output_dir']}/SUMMARY_{video_id}.md"
+        with open(out_name, 'w', encoding='utf-8') as f:
+            f.write(summary + RAW_DATA_SEPARATOR + job['context'])
+
+        cleanup_files(job['base_name'], args.save, console, job['artifacts'])
+        console.print(f"[bold green]Done! Saved to {out_name}[/bold green]")
+
+        item['recorded_mirrors'] = len(item['mirrors'])
+        if item['recorded_mirrors']:
+            mirror_artifacts(job['base_name'], out_name, [m['output_dir'] for m in item['mirrors'][:item['recorded_mirrors']]], console, job['artifacts'])
+
+        if search_index:
+            try:
+                with pipeline_metrics.stage('search_index'):
+                    search_index.add_video(video_id, job['data'], job['transcript'], summary, result_source(item), out_name)
+            except Exception as e:
+                console.print(f"[yellow]Could not add {video_id} to the search index: {e}[/yellow]")
+
+        if embedding_index:
+            try:
+                with pipeline_metrics.stage('embedding'):
+                    chunks = embedding_index.add_video(video_id, job['transcript'], job['data'])
+                if chunks:
+                    console.print(f"[dim]Embedded {chunks} transcript chunks[/dim]")
+            except Exception as e:
+                console.print(f"[yellow]Could not add {video_id} to the embedding index: {e}[/yellow]")
+
+        pipeline_metrics.end_video('success')
+        record_results(item, 'success', summary_name=f"SUMMARY_{video_id}.md")
+
+    refresh_comments = getattr(args, 'refresh_comments', False) and not analyze_comments
+
+    def refresh_community(item: dict, base_name: str, artifacts: VideoArtifacts) -> bool:
+        """
+        Update an existing summary's Community Intelligence section from comments posted since it was written
+        (or write the section from the newest comments when the summary has none).
+        Returns False (the video is then processed in full) when there is no summary to update.
+        """
+        video_id = item['video_id']
+        summary_path = f"{item['output_dir']}/SUMMARY_{video_id}.md"
+        if not os.path.exists(summary_path):
+            return False
+        with open(summary_path, 'r', encoding='utf-8') as f:
+            summary, _, raw_data = f.read().partition(RAW_DATA_SEPARATOR)
+        previous_section = summary_section(summary, COMMUNITY_HEADING)
+
+        # Stored comment IDs identify what the last run saw; without a store, fall back to the summary's age
+        known_ids = comment_store.comment_ids(video_id) if comment_store else set()
+        last_run = os.path.getmtime(summary_path)
+
+        # Under a temporary name, so a saved full info.json (--save meta) isn't replaced by the newest comments only
+        refresh_artifacts = VideoArtifacts(f"{base_name}.refresh")
+        try:
+            with pipeline_metrics.stage('metadata_fetch'):
+                run_yt_dlp(item['video_url'], refresh_artifacts.base_name, None, True, console, artifacts=refresh_artifacts,
+                           newest_comments=config.get('refresh_max_comments', 500))
+                json_path = refresh_artifacts.get('info')
+                if json_path is None:
+                    raise FileNotFoundError(f"yt-dlp did not write info.json for {video_id}")
+                comment_writer = comment_store.writer(video_id) if comment_store else None
+                data = load_video_metadata(json_path, config, on_comment=comment_writer.add if comment_writer else None)
+                if comment_writer:
+                    comment_writer.commit(data)
+        finally:
+            for path in refresh_artifacts.files():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        item['video_title'] = data.get('title', item['video_title'])
+
+        if previous_section is None:
+            # Nothing summarized about the community yet, so every fetched comment is new to the summary
+            new_comments = data.get('comments') or []
+        elif known_ids:
+            new_comments = [c for c in data.get('comments') or [] if c.get('id') not in known_ids]
+        else:
+            new_comments = [c for c in data.get('comments') or [] if (c.get('timestamp') or 0) > last_run]
+        pipeline_metrics.set('new_comments', len(new_comments))
+
+        if new_comments:
+            comments_text = process_comments({'comments': new_comments}, args.comments, args.all_comments)
+            video_summary = replace_summary_section(summary, COMMUNITY_HEADING, "").strip()
+            with pipeline_metrics.stage('llm_call'):
+                section = generate_community_update(video_summary, previous_section or "(none yet)", comments_text, config, console)
+            refreshed_at = time.strftime('%Y-%m-%d %H:%M')
+            with open(summary_path, 'w', encoding='utf-8') as f:
+                f.write(replace_summary_section(summary, COMMUNITY_HEADING, section).rstrip() + RAW_DATA_SEPARATOR
+                        + raw_data.rstrip() + f"\n\nNEW COMMENTS ({refreshed_at}):\n{comments_text}\n")
+            console.print(f"[bold green]Community section updated from {len(new_comments)} new comments: {summary_path}[/bold green]")
+        else:
+            console.print(f"[green]No new comments for {video_id}; summary left unchanged[/green]")
+
+        cleanup_files(base_name, args.save, console, artifacts)
+        item['recorded_mirrors'] = len(item['mirrors'])
+        if new_comments and item['recorded_mirrors']:
+            mirror_artifacts(base_name, summary_path, [m['output_dir'] for m in item['mirrors'][:item['recorded_mirrors']]], console, artifacts)
+        pipeline_metrics.end_video('success')
+        record_results(item, 'success', summary_name=f"SUMMARY_{video_id}.md")
+        return True
+
+    # Short videos wait here (with their metrics records suspended) until enough of them share one LLM request
+    pack_summaries = config.get('pack_summaries', False) and not analyze_comments
+    pack_max_videos = max(1, int(config.get('pack_max_videos', 5)))
+    pack_video_tokens = config.get('pack_video_tokens', 4000)
+    packs: dict[tuple, list] = {}
+
+    def queue_for_pack(job: dict) -> None:
+        video_config = job['config']
+        key = (video_config['llm_provider'], video_config['llm_model'], video_config.get('llm_tier'))
+        job['record'] = pipeline_metrics.suspend_video()
+        pack = packs.get(key, [])
+        if pack and sum(j['context_tokens'] for j in pack) + job['context_tokens'] > video_config.get('max_context_tokens', 65536):
+            flush_pack(key)
+        pack = packs.setdefault(key, [])
+        pack.append(job)
+        console.print(f"[blue]{job['item']['video_id']} ({job['context_tokens']} tokens) waits for a packed summary ({len(pack)}/{pack_max_videos})[/blue]")
+        if len(pack) >= pack_max_videos:
+            flush_pack(key)
+
+    def flush_pack(key: tuple) -> None:
+        """Summarize a pack in one request, then finish each of its videos"""
+        jobs = packs.pop(key, [])
+        summaries, (prompt_tokens, completion_tokens) = {}, (None, None)
+        if len(jobs) > 1:
+            start = time.perf_counter()
+            summaries, (prompt_tokens, completion_tokens) = generate_packed_summaries(
+                [(job['item']['video_id'], job['context']) for job in jobs], jobs[0]['config'], console)
+            elapsed = time.perf_counter() - start
+            total_tokens = sum(job['context_tokens'] for job in jobs) or 1
+
+        for job in jobs:
+            item = job['item']
+            pipeline_metrics.resume_video(job['record'])
+            try:
+                summary = summaries.get(item['video_id'])
+                if summary is None:
+                    with pipeline_metrics.stage('llm_call'):
+                        summary = generate_summary(job['context'], job['config'], console)
+                else:
+                    # Charge each video its share of the packed request
+                    share = job['context_tokens'] / total_tokens
+                    pipeline_metrics.add_stage_time('llm_call', elapsed * share)
+                    pipeline_metrics.add('tokens_in', round(prompt_tokens * share) if prompt_tokens else None)
+                    pipeline_metrics.add('tokens_out', round(completion_tokens * share) if completion_tokens else None)
+                    pipeline_metrics.label('llm_model', _llm_target(job['config'])[0])
+                    pipeline_metrics.set('packed_videos', len(jobs))
+                finish_video(job, summary)
+            except Exception as e:
+                console.print(f"[red]Failed {item['video_id']}: {e}[/red]")
+                pipeline_metrics.end_video('failed', str(e))
+                record_results(item, 'failed', error=str(e))
+
+    def flush_packs() -> None:
+        for key in list(packs):
+            flush_pack(key)
+
+    if worker:
+        import socket
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        console.print(f"[blue]Worker {worker_id} claiming videos from {queue_path} ({work_queue.remaining()} waiting)[/blue]")
+        # Packed videos stay leased until their summary is written, so flush before the heartbeat stops
+        work_items = work_queue.claims(worker_id, on_drained=flush_packs)
+    elif urls:
+        work_items = StreamScheduler(queue_items(), schedule_policy, config)
+    else:
+        work_items = []
 
-    console.print(f"[bold blue]Total videos to process: {len(processing_items)}[/bold blue]")
+    for item in work_items:
+        pipeline_metrics.set_gauge('queue_depth', work_queue.remaining() if worker else work_items.pending)
+        if exporter and args.metrics_textfile:
+            exporter.write_textfile(args.metrics_textfile)
 
-    for item in processing_items:
         video_id = item['video_id']
         video_url = item['video_url']
         output_dir = item['output_dir']
+        if worker:
+            # Output directories may not exist yet on this host
+            os.makedirs(output_dir, exist_ok=True)
+
+        if worker and item.get('late_mirrors'):
+            # Processed before a later fill listed it in more sources; only the results need linking
+            rows = link_late_mirrors(item, item['late_mirrors'])
+            work_queue.complete(video_id, worker_id, item['outcome'][0], rows)
+            continue
 
         base_name = f"{output_dir}/video_{video_id}"
+        artifacts = VideoArtifacts(base_name)
         console.rule(f"[bold green]Processing {video_id}")
 
+        pipeline_metrics.begin_video(video_id, result_source(item))
+
         try:
-            run_yt_dlp(video_url, base_name, args.save, args.no_subtitles, console)
+            if refresh_comments and refresh_community(item, base_name, artifacts):
+                continue
 
-            json_path = glob.glob(f"{base_name}*.info.json")[0]
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with pipeline_metrics.stage('metadata_fetch'):
+                # Comment analysis only needs info.json, so skip subtitles and media
+                run_yt_dlp(video_url, base_name, None if analyze_comments else args.save, args.no_subtitles or analyze_comments, console,
+                           artifacts=artifacts, subtitle_lang=default_subtitle_lang(config), video_id=video_id)
+
+                json_path = artifacts.get('info')
+                if json_path is None:
+                    raise FileNotFoundError(f"yt-dlp did not write info.json for {video_id}")
+                comment_writer = comment_store.writer(video_id) if comment_store else None
+                data = load_video_metadata(json_path, config, on_comment=comment_writer.add if comment_writer else None)
+                if comment_writer:
+                    comment_writer.commit(data)
+
+                if not (args.no_subtitles or analyze_comments):
+                    fetch_preferred_subtitles(json_path, base_name, data, config, console, artifacts)
 
             # Update title from metadata
             item['video_title'] = data.get('title', 'Unknown')
+            pipeline_metrics.set('audio_duration', data.get('duration'))
 
-            transcript = get_transcript(base_name, video_url, config, console, args.no_subtitles, args.save)
+            if analyze_comments:
+                cleanup_files(base_name, args.save, console, artifacts)
+                console.print(f"[bold green]Stored {comment_writer.count} comments for {video_id}[/bold green]")
+                pipeline_metrics.end_video('success')
+                record_results(item, 'success')
+                continue
+
+            transcript = get_transcript(base_name, video_url, config, console, args.no_subtitles, args.save, video_id, artifacts)
 
             # Build intelligent context with token-based limits
-            context = build_intelligent_context(data, transcript, config, console)
+            with pipeline_metrics.stage('tokenization'):
+                video_config = config
+                if config.get('llm_tiers'):
+                    encoding = get_encoding_for_model(config['llm_provider'], config['llm_model'])
+                    transcript_tokens = count_tokens(transcript, encoding)
+                    video_config = select_llm_tier(config, data.get('duration'), transcript_tokens)
+                    if 'llm_tier' in video_config:
+                        console.print(f"[blue]LLM tier '{video_config['llm_tier']}' ({transcript_tokens} transcript tokens)[/blue]")
+                        pipeline_metrics.label('llm_tier', str(video_config['llm_tier']))
+                context = build_intelligent_context(data, transcript, video_config, console)
+                context_tokens = count_tokens(context, get_encoding_for_model(video_config['llm_provider'], video_config['llm_model'])) if pack_summaries else None
+
+            job = {'item': item, 'data': data, 'transcript': transcript, 'context': context, 'context_tokens': context_tokens,
+                   'config': video_config, 'base_name': base_name, 'artifacts': artifacts}
+            if pack_summaries and context_tokens <= pack_video_tokens:
+                queue_for_pack(job)
+                continue
 
-            summary = generate_summary(context, config, console)
+            with pipeline_metrics.stage('llm_call'):
+                summary = generate_summary(context, video_config, console)
+            finish_video(job, summary)
+        except Exception as e:
+            console.print(f"[red]Failed: {e}[/red]")
+            pipeline_metrics.end_video('failed', str(e))
+            record_results(item, 'failed', error=str(e))
+            continue
 
-            out_name = f"{output_dir}/SUMMARY_{video_id}.md"
-            with open(out_name, 'w', encoding='utf-8') as f:
-                f.write(summary + "\n\n" + "="*30 + "\nRAW DATA\n" + "="*30 + "\n" + context)
+    flush_packs()
+    pipeline_metrics.set_gauge('queue_depth', 0)
 
-            cleanup_files(base_name, args.save, console)
-            console.print(f"[bold green]Done! Saved to {out_name}[/bold green]")
+    # A source listed after its shared video was processed still gets the results linked in
+    for item in queued.values():
+        late_mirrors = item['mirrors'][item.get('recorded_mirrors', len(item['mirrors'])):]
+        if not late_mirrors or 'outcome' not in item:
+            continue
+        link_late_mirrors(item, late_mirrors)
+        item['recorded_mirrors'] = len(item['mirrors'])
 
-            # Track success
-            source_type = 'direct'
-            if item['playlist_id']:
-                source_type = f"playlist:{item['playlist_id']}"
-            elif item['channel_id']:
-                source_type = f"channel:{item['channel_id']}"
+    shared_count = sum(1 for item in queued.values() if item['mirrors'])
+    if shared_count:
+        console.print(f"[blue]{shared_count} videos appeared in multiple sources and were processed once[/blue]")
 
-            results.append({
-                'video_id': video_id,
-                'video_title': item['video_title'],
-                'status': 'success',
-                'error': None,
-                'output_file': out_name,
-                'source': source_type
-            })
-        except Exception as e:
-            console.print(f"[red]Failed: {e}[/red]")
-            source_type = 'direct'
-            if item['playlist_id']:
-                source_type = f"playlist:{item['playlist_id']}"
-            elif item['channel_id']:
-                source_type = f"channel:{item['channel_id']}"
-
-            results.append({
-                'video_id': video_id,
-                'video_title': item['video_title'],
-                'status': 'failed',
-                'error': str(e),
-                'output_file': None,
-                'source': source_type
-            })
-            continue
+    # Score all stored comments per source with the local scorer
+    source_analytics = {}
+    if analyze_comments and comment_store:
+        try:
+            scorer = CommentScorer(batch_size=config.get('comment_batch_size', 20000))
+        except ImportError as e:
+            scorer = None
+            console.print(f"[red]numpy is required for --analyze-comments: {e}[/red]")
+
+        if scorer:
+            sources_to_analyze = [(f"playlist:{pid}", pdata['videos']) for pid, pdata in playlists.items()]
+            sources_to_analyze += [(f"channel:{cid}", cdata['videos']) for cid, cdata in channels.items()]
+            direct_ids = [item['video_id'] for item in queued.values() if item['source_type'] == 'direct']
+            if direct_ids:
+                sources_to_analyze.append(('direct', [{'video_id': vid} for vid in direct_ids]))
+
+            for source_key, videos in sources_to_analyze:
+                with pipeline_metrics.stage('comment_analysis'):
+                    columns = comment_store.channel_comments(video_ids=[v['video_id'] for v in videos])
+                    analytics = scorer.analyze(columns)
+                source_analytics[source_key] = analytics
+                overall = analytics['overall']
+                console.print(f"[blue]{source_key}: {overall['comments']} comments, {describe_community(overall)} "
+                              f"(divisiveness {overall['divisiveness']:.2f})[/blue]")
+
+    if comment_store:
+        comment_store.close()
+    if search_index:
+        search_index.close()
+    if embedding_index:
+        embedding_index.close()
+    if exporter and args.metrics_textfile:
+        exporter.write_textfile(args.metrics_textfile)
 
     # Generate playlist metadata files
     for playlist_id, playlist_data in playlists.items():
-        create_playlist_metadata(playlist_id, playlist_data, results, console)
+        create_playlist_metadata(playlist_id, playlist_data, results, console, source_analytics.get(f"playlist:{playlist_id}"))
 
     # Generate channel metadata files
     for channel_id, channel_data in channels.items():
-        create_channel_metadata(channel_id, channel_data, results, console)
+        create_channel_metadata(channel_id, channel_data, results, console, source_analytics.get(f"channel:{channel_id}"))
+
+    if work_queue:
+        counts = work_queue.counts()
+        console.print(f"[blue]Queue {queue_path}: " + ", ".join(f"{n} {status}" for status, n in sorted(counts.items())) + "[/blue]")
+        work_queue.close()
 
     # Print results summary
-    print_results_summary(results, console)
+    print_results_summary(results.rows(), console)
+    pipeline_metrics.print_summary(console)
+    if pipeline_metrics.profiler:
+        pipeline_metrics.profiler.finish(console)
 
     # End timing and display total execution time
     script_end_time = time.time()
@@ -1543,6 +5004,9 @@ def main(args):
     console.print(f"\n[bold blue]Script completed in {int(minutes):02d}:{seconds:05.2f}[/bold blue]")
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "search":
+        search_main(get_search_parser().parse_args(sys.argv[2:]))
+        sys.exit(0)
     parser = get_parser()
     args = parser.parse_args()
     main(args)
\ No newline at end of file